@@ -0,0 +1,71 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import config
+
+
+class AnalysisIndex:
+    """Índice persistente (SQLite) dos resultados de análise de vídeo
+
+    Cada resultado fica associado ao caminho, tamanho e mtime do arquivo e
+    aos parâmetros da análise. Se o vídeo não mudou e os parâmetros são os
+    mesmos, o resultado é reaproveitado sem decodificar nenhum frame.
+    Abre uma conexão por operação, então pode ser usado de várias threads
+    ou processos ao mesmo tempo.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(config.CACHE_DIR, "analysis.sqlite")
+        self._initialized = False
+
+    def get(self, kind, video_path, params):
+        """Resultado salvo para este arquivo/parâmetros, ou None se não houver"""
+        stat = os.stat(video_path)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT size, mtime_ns, result FROM analysis WHERE path = ? AND kind = ? AND params = ?",
+                (os.path.abspath(video_path), kind, self._params_key(params))
+            ).fetchone()
+
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+        return json.loads(row[2])
+
+    def put(self, kind, video_path, params, result):
+        """Salva (ou substitui) o resultado da análise"""
+        stat = os.stat(video_path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis (path, kind, params, size, mtime_ns, result, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(video_path), kind, self._params_key(params),
+                 stat.st_size, stat.st_mtime_ns, json.dumps(result), time.time())
+            )
+
+    def _params_key(self, params):
+        return json.dumps(params, sort_keys=True)
+
+    @contextmanager
+    def _connect(self):
+        """Conexão curta: commit ao final e fecha sempre"""
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS analysis ("
+                    "path TEXT NOT NULL, kind TEXT NOT NULL, params TEXT NOT NULL, "
+                    "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+                    "result TEXT NOT NULL, updated_at REAL NOT NULL, "
+                    "PRIMARY KEY (path, kind, params))"
+                )
+                self._initialized = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+import config
+import lru_dir
+from ffmpeg_utils import iter_audio_chunks
+
+
+class AudioCache:
+    """Cache de áudio decodificado compartilhado entre AudioProcessor e VideoEditor
+
+    Cada arquivo é identificado por caminho + mtime + tamanho. O PCM float32
+    fica em disco (memory-mapped, não ocupa RAM) junto com as features
+    derivadas (envelope RMS, envelope de onsets), então a música é
+    decodificada uma única vez e reaproveitada nas próximas execuções.
+    O disco é limitado a `max_bytes` com remoção LRU.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, sample_rate=None, channels=2, memory_items=8):
+        self.cache_dir = Path(cache_dir or os.path.join(config.CACHE_DIR, "audio"))
+        self.max_bytes = max_bytes if max_bytes is not None else config.AUDIO_CACHE_MAX_MB * 1024 * 1024
+        self.sample_rate = sample_rate or config.AUDIO_SAMPLE_RATE
+        self.channels = channels
+        self.memory_items = memory_items
+        self._entries = OrderedDict()  # chave -> {'meta', 'pcm', 'features'}
+
+    def key(self, path):
+        """Chave do arquivo: muda quando o arquivo é editado ou substituído"""
+        stat = os.stat(path)
+        raw = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.sample_rate}|{self.channels}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def pcm(self, path):
+        """PCM float32 (amostras, canais), decodificado só na primeira vez"""
+        return self._entry(path)['pcm']
+
+    def duration(self, path):
+        """Duração em segundos (sem reabrir o arquivo)"""
+        return self._entry(path)['meta']['duration']
+
+    def feature(self, path, name, compute):
+        """Feature derivada do PCM, calculada uma vez com `compute(pcm, sample_rate)`"""
+        key = self.key(path)
+        entry = self._entry(path, key)
+        if name in entry['features']:
+            return entry['features'][name]
+
+        feature_path = self.cache_dir / f"{key}.{name}.npy"
+        if feature_path.exists():
+            value = np.load(feature_path)
+            lru_dir.touch(feature_path)
+        else:
+            value = np.asarray(compute(entry['pcm'], self.sample_rate))
+            tmp_path = feature_path.with_name(feature_path.name + f".{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, value)
+            os.replace(tmp_path, feature_path)
+
+        entry['features'][name] = value
+        return value
+
+    def _entry(self, path, key=None):
+        key = key or self.key(path)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        pcm_path = self.cache_dir / f"{key}.pcm"
+        meta_path = self.cache_dir / f"{key}.json"
+        if not (pcm_path.exists() and meta_path.exists()):
+            self._decode(path, pcm_path, meta_path)
+            for evicted in lru_dir.evict(self.cache_dir, self.max_bytes, keep={key}):
+                self._entries.pop(evicted, None)
+        else:
+            lru_dir.touch(pcm_path)
+
+        meta = json.loads(meta_path.read_text())
+        pcm = np.memmap(pcm_path, dtype=np.float32, mode='r', shape=(meta['samples'], self.channels))
+        entry = {'meta': meta, 'pcm': pcm, 'features': {}}
+
+        self._entries[key] = entry
+        while len(self._entries) > self.memory_items:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _decode(self, path, pcm_path, meta_path):
+        """Decodifica em blocos direto para o arquivo (memória constante)"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        tmp_pcm = pcm_path.with_name(pcm_path.name + suffix)
+
+        samples = 0
+        try:
+            with open(tmp_pcm, 'wb') as f:
+                for chunk in iter_audio_chunks(path, sample_rate=self.sample_rate, channels=self.channels):
+                    f.write(chunk.tobytes())
+                    samples += len(chunk)
+        except BaseException:
+            tmp_pcm.unlink(missing_ok=True)
+            raise
+
+        if samples == 0:
+            tmp_pcm.unlink(missing_ok=True)
+            raise RuntimeError(f"{path} não tem áudio")
+
+        meta = {
+            'path': os.path.abspath(path),
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'samples': samples,
+            'duration': samples / self.sample_rate
+        }
+        tmp_meta = meta_path.with_name(meta_path.name + suffix)
+        tmp_meta.write_text(json.dumps(meta))
+        os.replace(tmp_pcm, pcm_path)
+        os.replace(tmp_meta, meta_path)
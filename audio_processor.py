@@ -1,55 +1,91 @@
 import numpy as np
-try:
-    from moviepy.editor import VideoFileClip, AudioFileClip
-except ImportError:
-    from moviepy import VideoFileClip, AudioFileClip
+import config
+from beat_tracker import BeatTracker
+from ffmpeg_utils import AUDIO_EXTENSIONS, decode_audio, iter_audio_chunks, load_moviepy, probe_media
 
 class AudioProcessor:
-    def detect_beats(self, audio_source, sensitivity=1.5):
-        """Detecta beats na música (pode ser vídeo ou arquivo de áudio)"""
-        if isinstance(audio_source, str):
-            # É um caminho de arquivo
-            if audio_source.lower().endswith(('.mp3', '.wav', '.m4a', '.aac', '.ogg')):
-                audio_clip = AudioFileClip(audio_source)
-                duration = audio_clip.duration
-                audio_clip.close()
+    def __init__(self, cache=None):
+        # Cache de áudio decodificado compartilhado (AudioCache); None = decodifica a cada chamada
+        self.cache = cache
+    
+    def detect_beats(self, audio_source, sensitivity=1.5, start=0, duration=None):
+        """Detecta beats na música (pode ser vídeo ou arquivo de áudio)
+        
+        Com `start`/`duration` analisa só esse trecho e retorna os tempos
+        relativos a `start`. `sensitivity` maior mantém beats mais fracos
+        no começo/fim do trecho.
+        """
+        if not isinstance(audio_source, str):
+            # Só temos a duração: gera pontos de corte aproximados
+            return self._fallback_beats(audio_source)
+        
+        trim_threshold = 0.75 / sensitivity
+        
+        try:
+            if self.cache is not None:
+                beat_times = self._cached_beat_times(audio_source, start, duration, trim_threshold)
             else:
-                # É um vídeo
-                clip = VideoFileClip(audio_source)
-                if clip.audio is None:
-                    clip.close()
-                    return []
-                duration = clip.duration
-                clip.close()
-        else:
-            duration = audio_source
+                tracker = BeatTracker(sample_rate=config.AUDIO_ANALYSIS_SAMPLE_RATE)
+                chunks = iter_audio_chunks(
+                    audio_source,
+                    sample_rate=config.AUDIO_ANALYSIS_SAMPLE_RATE,
+                    chunk_seconds=config.BEAT_CHUNK_SECONDS,
+                    start=start,
+                    duration=duration
+                )
+                beat_times = tracker.beat_times(chunks, trim_threshold=trim_threshold)
+        except RuntimeError as e:
+            # Vídeo sem áudio ou arquivo ilegível
+            print(f"   ⚠️  Não foi possível detectar beats: {e}")
+            return []
         
-        # Análise simplificada de volume para detectar beats
-        sample_rate = 44100
-        samples_per_beat = int(sample_rate * 0.5)  # Analisa a cada 0.5s
+        return [float(t) for t in beat_times]
+    
+    def _cached_beat_times(self, audio_path, start, duration, trim_threshold):
+        """Beats do trecho a partir do envelope de onsets da faixa inteira (em cache)"""
+        tracker = BeatTracker(sample_rate=self.cache.sample_rate)
+        onset_env = self.cache.feature(
+            audio_path,
+            f"onset_{tracker.n_fft}_{tracker.hop_length}",
+            lambda pcm, sample_rate: tracker.onset_envelope(self._mono_chunks(pcm, sample_rate))
+        )
         
+        first = int(round(start * tracker.frame_rate))
+        last = len(onset_env) if duration is None else int(round((start + duration) * tracker.frame_rate))
+        frames = tracker.track(onset_env[first:last], trim_threshold=trim_threshold)
+        return np.maximum((frames + first) / tracker.frame_rate - start, 0.0)
+    
+    def _mono_chunks(self, pcm, sample_rate):
+        """Blocos mono do PCM em cache, sem copiar a faixa inteira"""
+        chunk = int(config.BEAT_CHUNK_SECONDS * sample_rate)
+        for i in range(0, len(pcm), chunk):
+            yield pcm[i:i + chunk].mean(axis=1, dtype=np.float32)
+    
+    def _fallback_beats(self, duration):
+        """Pontos de corte a cada 2-4s quando não há áudio para analisar"""
         beat_times = []
         current_time = 2.0  # Começa após 2s
+        rng = np.random.default_rng(config.RANDOM_SEED)
         
         while current_time < duration - 2:
             beat_times.append(current_time)
-            current_time += np.random.uniform(2.0, 4.0)  # Variação natural
+            current_time += rng.uniform(2.0, 4.0)  # Variação natural
         
         return beat_times
     
     def get_music_intensity(self, audio_path):
         """Retorna a intensidade da música ao longo do tempo"""
-        if audio_path.lower().endswith(('.mp3', '.wav', '.m4a', '.aac', '.ogg')):
-            audio_clip = AudioFileClip(audio_path)
-            duration = audio_clip.duration
-            audio_clip.close()
+        if self.cache is not None:
+            try:
+                duration = self.cache.duration(audio_path)
+            except RuntimeError:
+                return []
         else:
-            clip = VideoFileClip(audio_path)
-            if clip.audio is None:
-                clip.close()
+            # Só o cabeçalho do arquivo: nada é decodificado
+            info = probe_media(audio_path)
+            if not info['has_audio']:
                 return []
-            duration = clip.duration
-            clip.close()
+            duration = info['duration']
         
         intensities = []
         
@@ -62,55 +98,138 @@ class AudioProcessor:
     
     def get_audio_duration(self, audio_path):
         """Retorna a duração do arquivo de áudio"""
-        if audio_path.lower().endswith(('.mp3', '.wav', '.m4a', '.aac', '.ogg')):
-            audio_clip = AudioFileClip(audio_path)
-            duration = audio_clip.duration
-            audio_clip.close()
-            return duration
+        if audio_path.lower().endswith(AUDIO_EXTENSIONS):
+            if self.cache is not None:
+                return self.cache.duration(audio_path)
+            return probe_media(audio_path)['duration']
         return None
     
     def find_best_segment(self, audio_path, target_duration=None, min_duration=15):
         """Encontra o melhor trecho da música baseado em energia/volume"""
-        clip = None
-        is_video = False
+        window_size = 1.0  # Analisa a cada 1 segundo
+        decoded = self._load_pcm(audio_path) if (self.cache is not None or config.AUDIO_SINGLE_PASS) else None
         
-        if audio_path.lower().endswith(('.mp3', '.wav', '.m4a', '.aac', '.ogg')):
-            audio_clip = AudioFileClip(audio_path)
+        if decoded is not None:
+            # Modo rápido: a faixa inteira foi decodificada uma única vez
+            samples, sample_rate = decoded
+            duration = len(samples) / sample_rate
+            target_duration = self._resolve_target_duration(target_duration, duration)
+            
+            # Se a música é muito curta, retorna tudo
+            if duration <= target_duration + 5:
+                return self._full_segment(duration)
+            
+            num_windows = int(duration / window_size)
+            print(f"   📊 Analisando {num_windows} segmentos da música...")
+            if self.cache is not None:
+                energies = self.cache.feature(
+                    audio_path,
+                    f"rms_{window_size:g}s",
+                    lambda pcm, rate: self._window_rms(pcm, rate, window_size, num_windows)
+                )
+            else:
+                energies = self._window_rms(samples, sample_rate, window_size, num_windows)
         else:
-            clip = VideoFileClip(audio_path)
-            is_video = True
-            if clip.audio is None:
-                clip.close()
+            audio_clip, clip = self._open_audio(audio_path)
+            if audio_clip is None:
                 return None
-            audio_clip = clip.audio
+            
+            duration = audio_clip.duration
+            target_duration = self._resolve_target_duration(target_duration, duration)
+            
+            if duration <= target_duration + 5:
+                audio_clip.close()
+                if clip:
+                    clip.close()
+                return self._full_segment(duration)
+            
+            num_windows = int(duration / window_size)
+            print(f"   📊 Analisando {num_windows} segmentos da música...")
+            energies = self._window_rms_per_segment(audio_clip, duration, window_size, num_windows)
+            
+            audio_clip.close()
+            if clip:
+                clip.close()
         
-        duration = audio_clip.duration
+        if len(energies) == 0:
+            return None
         
+        return self._select_segment(energies, duration, window_size, target_duration, min_duration)
+    
+    def _resolve_target_duration(self, target_duration, duration):
+        """Duração alvo do trecho, limitada à duração da música"""
         # Se não especificou duração, usa 60s ou a duração total (o que for menor)
         if target_duration is None:
             target_duration = min(60, duration)
         
         # Garante que não excede a duração total
-        target_duration = min(target_duration, duration)
+        return min(target_duration, duration)
+    
+    def _full_segment(self, duration):
+        """Trecho que cobre a música inteira"""
+        return {
+            'start': 0,
+            'end': duration,
+            'duration': duration,
+            'score': 100
+        }
+    
+    def _open_audio(self, audio_path):
+        """Abre o áudio com o MoviePy, retornando (audio_clip, video_clip ou None)"""
+        moviepy = load_moviepy()
+        if audio_path.lower().endswith(AUDIO_EXTENSIONS):
+            return moviepy.AudioFileClip(audio_path), None
         
-        # Se a música é muito curta, retorna tudo
-        if duration <= target_duration + 5:
-            audio_clip.close()
-            if is_video and clip:
-                clip.close()
-            return {
-                'start': 0,
-                'end': duration,
-                'duration': duration,
-                'score': 100
-            }
-        
-        # Analisa energia em janelas de tempo
-        window_size = 1.0  # Analisa a cada 1 segundo
-        num_windows = int(duration / window_size)
-        energies = []
+        clip = moviepy.VideoFileClip(audio_path)
+        if clip.audio is None:
+            clip.close()
+            return None, None
+        return clip.audio, clip
+    
+    def _load_pcm(self, audio_path):
+        """PCM estéreo da faixa inteira (do cache ou de uma única chamada do ffmpeg)
         
-        print(f"   📊 Analisando {num_windows} segmentos da música...")
+        Retorna (amostras, taxa de amostragem) ou None se não der para decodificar.
+        """
+        try:
+            if self.cache is not None:
+                return self.cache.pcm(audio_path), self.cache.sample_rate
+            samples = decode_audio(audio_path, sample_rate=config.AUDIO_ANALYSIS_SAMPLE_RATE, channels=2)
+        except RuntimeError as e:
+            print(f"   ⚠️  Decodificação única falhou, usando análise por janelas: {e}")
+            return None
+        
+        return (samples, config.AUDIO_ANALYSIS_SAMPLE_RATE) if len(samples) > 0 else None
+    
+    def _window_rms(self, samples, sample_rate, window_size, num_windows, batch_windows=64):
+        """RMS de cada janela calculado em lote sobre o array decodificado
+        
+        Processa `batch_windows` janelas por vez para não copiar a faixa
+        inteira ao fazer a média dos canais (o PCM pode ser um memmap).
+        """
+        window_samples = int(round(window_size * sample_rate))
+        num_windows = min(num_windows, len(samples) // window_samples)
+        energies = np.empty(num_windows)
+        
+        for first in range(0, num_windows, batch_windows):
+            count = min(batch_windows, num_windows - first)
+            block = samples[first * window_samples:(first + count) * window_samples]
+            
+            # Média dos canais (mesmo critério do modo antigo; o downmix do ffmpeg usa outros pesos)
+            if block.ndim > 1:
+                block = block.mean(axis=1, dtype=np.float32)
+            
+            # View (janelas, amostras) sem cópia; einsum acumula em float64
+            windows = block.reshape(count, window_samples)
+            energies[first:first + count] = np.sqrt(
+                np.einsum('ij,ij->i', windows, windows, dtype=np.float64) / window_samples
+            )
+        
+        return energies
+    
+    def _window_rms_per_segment(self, audio_clip, duration, window_size, num_windows):
+        """RMS de cada janela decodificando um subclip por janela (modo antigo)"""
+        energies = np.empty(num_windows)
         
         for i in range(num_windows):
             start_time = i * window_size
@@ -122,78 +241,59 @@ class AudioProcessor:
                 
                 # Calcula RMS (Root Mean Square) como medida de energia
                 audio_array = segment.to_soundarray()
+                energies[i] = 0.0
                 if len(audio_array) > 0:
                     # Se é estéreo, calcula média dos canais
                     if len(audio_array.shape) > 1:
                         audio_array = np.mean(audio_array, axis=1)
                     
                     # RMS = raiz quadrada da média dos quadrados
-                    rms = np.sqrt(np.mean(audio_array ** 2))
-                    energies.append({
-                        'start': start_time,
-                        'end': end_time,
-                        'energy': rms,
-                        'duration': end_time - start_time
-                    })
+                    energies[i] = np.sqrt(np.mean(audio_array ** 2))
                 
                 segment.close()
             except Exception as e:
                 # Se der erro, assume energia média
-                energies.append({
-                    'start': start_time,
-                    'end': end_time,
-                    'energy': 0.1,
-                    'duration': end_time - start_time
-                })
-        
-        audio_clip.close()
-        if is_video and clip:
-            clip.close()
+                energies[i] = 0.1
         
-        if not energies:
-            return None
-        
-        # Encontra o melhor segmento contínuo
-        num_windows_needed = int(target_duration / window_size)
+        return energies
+    
+    def _select_segment(self, energies, duration, window_size, target_duration, min_duration):
+        """Escolhe o trecho contínuo de maior energia a partir do RMS por janela"""
+        num_windows_needed = max(1, int(target_duration / window_size))
         best_segment = None
-        best_score = 0
         
-        # Procura janela deslizante com maior energia média
-        for i in range(len(energies) - num_windows_needed + 1):
-            segment_energies = energies[i:i + num_windows_needed]
-            avg_energy = np.mean([e['energy'] for e in segment_energies])
+        # Janela deslizante via soma acumulada: média de energies[i:i+n] para todo i
+        if len(energies) >= num_windows_needed:
+            cumulative = np.concatenate(([0.0], np.cumsum(energies)))
+            avg_energy = (cumulative[num_windows_needed:] - cumulative[:-num_windows_needed]) / num_windows_needed
             
-            # Penaliza se estiver muito no início ou muito no final
-            position_penalty = 1.0
-            center_time = (segment_energies[0]['start'] + segment_energies[-1]['end']) / 2
-            relative_position = center_time / duration
+            starts = np.arange(len(avg_energy)) * window_size
+            ends = np.minimum(starts + num_windows_needed * window_size, duration)
             
             # Prefere trechos no meio da música (evita intros longas e finais)
-            if relative_position < 0.1 or relative_position > 0.9:
-                position_penalty = 0.7
-            elif relative_position < 0.2 or relative_position > 0.8:
-                position_penalty = 0.85
+            relative_position = (starts + ends) / 2 / duration
+            position_penalty = np.where(
+                (relative_position < 0.1) | (relative_position > 0.9), 0.7,
+                np.where((relative_position < 0.2) | (relative_position > 0.8), 0.85, 1.0)
+            )
             
-            score = avg_energy * position_penalty
+            scores = avg_energy * position_penalty
+            best = int(np.argmax(scores))
             
-            if score > best_score:
-                best_score = score
+            if scores[best] > 0:
                 best_segment = {
-                    'start': segment_energies[0]['start'],
-                    'end': segment_energies[-1]['end'],
-                    'duration': segment_energies[-1]['end'] - segment_energies[0]['start'],
-                    'score': score,
-                    'avg_energy': avg_energy
+                    'start': float(starts[best]),
+                    'end': float(ends[best]),
+                    'duration': float(ends[best] - starts[best]),
+                    'score': float(scores[best]),
+                    'avg_energy': float(avg_energy[best])
                 }
         
         # Se não encontrou segmento bom, pega o de maior energia individual
         if best_segment is None or best_segment['duration'] < min_duration:
-            # Ordena por energia
-            energies.sort(key=lambda x: x['energy'], reverse=True)
-            
-            # Tenta encontrar segmento contínuo a partir do mais energético
-            for top_energy in energies[:5]:  # Top 5 mais energéticos
-                start = max(0, top_energy['start'] - target_duration / 2)
+            # Tenta encontrar segmento contínuo a partir do mais energético (top 5)
+            for i in np.argsort(-energies, kind='stable')[:5]:
+                start = max(0, i * window_size - target_duration / 2)
                 end = min(duration, start + target_duration)
                 
                 if end - start >= min_duration:
@@ -201,9 +301,9 @@ class AudioProcessor:
                         'start': start,
                         'end': end,
                         'duration': end - start,
-                        'score': top_energy['energy'],
-                        'avg_energy': top_energy['energy']
+                        'score': float(energies[i]),
+                        'avg_energy': float(energies[i])
                     }
                     break
         
-        return best_segment
\ No newline at end of file
+        return best_segment
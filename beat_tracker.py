@@ -0,0 +1,161 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class BeatTracker:
+    """Detector de beats só com NumPy
+
+    1. Envelope de onsets por fluxo espectral (STFT em lote, bloco a bloco)
+    2. Andamento estimado por autocorrelação do envelope
+    3. Alinhamento dos beats por programação dinâmica (Ellis, 2007)
+    """
+
+    def __init__(self, sample_rate=22050, n_fft=None, hop_length=None,
+                 tightness=100.0, start_bpm=120.0, min_bpm=40.0, max_bpm=240.0):
+        # Por padrão mantém a resolução de 2048/512 amostras a 22050 Hz
+        scale = max(1, int(round(sample_rate / 22050)))
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft or 2048 * scale
+        self.hop_length = hop_length or 512 * scale
+        self.tightness = tightness
+        self.start_bpm = start_bpm
+        self.min_bpm = min_bpm
+        self.max_bpm = max_bpm
+        self.window = np.hanning(self.n_fft).astype(np.float32)
+
+    @property
+    def frame_rate(self):
+        """Frames do envelope por segundo"""
+        return self.sample_rate / self.hop_length
+
+    def onset_envelope(self, chunks):
+        """Fluxo espectral a partir de blocos de amostras mono
+
+        Só o resto de cada bloco (< n_fft amostras) e o último espectro ficam
+        entre iterações, então a memória não cresce com a duração da faixa.
+        O primeiro frame é centralizado em t=0.
+        """
+        pending = np.zeros(self.n_fft // 2, dtype=np.float32)
+        previous = None
+        flux = []
+
+        for chunk in chunks:
+            data = np.concatenate((pending, chunk))
+            if len(data) < self.n_fft:
+                pending = data
+                continue
+
+            frames = sliding_window_view(data, self.n_fft)[::self.hop_length]
+            pending = data[len(frames) * self.hop_length:]
+
+            spectrum = np.log1p(100.0 * np.abs(np.fft.rfft(frames * self.window, axis=1)))
+            if previous is not None:
+                spectrum_with_previous = np.vstack((previous, spectrum))
+            else:
+                spectrum_with_previous = np.vstack((spectrum[:1], spectrum))
+            previous = spectrum[-1:]
+
+            # Só aumentos de energia contam como onset
+            diff = np.diff(spectrum_with_previous, axis=0)
+            flux.append(np.maximum(diff, 0.0).mean(axis=1))
+
+        if not flux:
+            return np.zeros(0)
+        return np.concatenate(flux)
+
+    def estimate_tempo(self, onset_env):
+        """Estima o andamento (BPM) pela autocorrelação do envelope de onsets"""
+        n = len(onset_env)
+        min_lag = max(1, int(round(60.0 * self.frame_rate / self.max_bpm)))
+        max_lag = min(n - 1, int(round(60.0 * self.frame_rate / self.min_bpm)))
+        if max_lag <= min_lag:
+            return self.start_bpm
+
+        centered = onset_env - onset_env.mean()
+        size = 1 << int(np.ceil(np.log2(2 * n)))
+        spectrum = np.fft.rfft(centered, size)
+        autocorr = np.fft.irfft(spectrum * np.conj(spectrum), size)[:n]
+
+        lags = np.arange(min_lag, max_lag + 1)
+        bpms = 60.0 * self.frame_rate / lags
+
+        # Prior log-normal em torno de start_bpm evita escolher metade/dobro do andamento
+        prior = np.exp(-0.5 * np.log2(bpms / self.start_bpm) ** 2)
+        weighted = autocorr[lags] * prior
+        if not np.any(weighted > 0):
+            return self.start_bpm
+        return float(bpms[np.argmax(weighted)])
+
+    def track(self, onset_env, bpm=None, trim_threshold=0.5):
+        """Alinha os beats ao envelope por programação dinâmica
+
+        Retorna os índices de frame dos beats.
+        """
+        if len(onset_env) == 0 or not np.any(onset_env > 0):
+            return np.zeros(0, dtype=int)
+
+        if bpm is None:
+            bpm = self.estimate_tempo(onset_env)
+        period = max(1, int(round(60.0 * self.frame_rate / bpm)))
+
+        # Suaviza o envelope com uma gaussiana da largura de um período
+        norm = onset_env / (onset_env.std(ddof=1) + 1e-10) if len(onset_env) > 1 else onset_env
+        offsets = np.arange(-period, period + 1)
+        gaussian = np.exp(-0.5 * (offsets * 32.0 / period) ** 2)
+        localscore = np.convolve(norm, gaussian, mode='same')
+
+        # Custo de transição: penaliza distância ao período esperado
+        window = np.arange(-2 * period, -int(round(period / 2)) + 1)
+        txwt = -self.tightness * np.log(-window / period) ** 2
+
+        n = len(localscore)
+        cumscore = np.zeros(n)
+        backlink = np.full(n, -1, dtype=int)
+        score_thresh = 0.01 * localscore.max()
+        first_beat = True
+
+        for i in range(n):
+            # Predecessores possíveis: frames [i - 2*period, i - period/2]
+            lo = i + window[0]
+            hi = i + window[-1]
+            if first_beat or hi < 0:
+                cumscore[i] = localscore[i]
+                if localscore[i] >= score_thresh:
+                    first_beat = False
+                continue
+
+            skip = max(0, -lo)
+            scores = txwt[skip:] + cumscore[lo + skip:hi + 1]
+            best = int(np.argmax(scores))
+            cumscore[i] = localscore[i] + scores[best]
+            backlink[i] = lo + skip + best
+
+        # Último beat: último máximo local com pontuação acumulada razoável
+        is_peak = np.zeros(n, dtype=bool)
+        is_peak[1:-1] = (cumscore[1:-1] > cumscore[:-2]) & (cumscore[1:-1] >= cumscore[2:])
+        if n > 1:
+            is_peak[-1] = cumscore[-1] > cumscore[-2]
+        peaks = np.flatnonzero(is_peak)
+        if len(peaks) == 0:
+            return np.zeros(0, dtype=int)
+        median = np.median(cumscore[peaks])
+        last = peaks[cumscore[peaks] >= 0.5 * median][-1]
+
+        beats = [last]
+        while backlink[beats[-1]] >= 0:
+            beats.append(backlink[beats[-1]])
+        beats = np.array(beats[::-1], dtype=int)
+
+        # Remove beats fracos no começo e no fim (silêncio/intro/fade)
+        strength = localscore[beats]
+        threshold = trim_threshold * np.sqrt(np.mean(localscore ** 2))
+        strong = np.flatnonzero(strength >= threshold)
+        if len(strong) == 0:
+            return np.zeros(0, dtype=int)
+        return beats[strong[0]:strong[-1] + 1]
+
+    def beat_times(self, chunks, trim_threshold=0.5):
+        """Tempos dos beats (segundos, a partir do início dos blocos)"""
+        onset_env = self.onset_envelope(chunks)
+        frames = self.track(onset_env, trim_threshold=trim_threshold)
+        return frames * self.hop_length / self.sample_rate
@@ -0,0 +1,69 @@
+"""Benchmark dos perfis de encode (config.ENCODE_PROFILES)
+
+Codifica um reel sintético de 1080x1920 (padrão em movimento com ruído,
+gerado pelo próprio ffmpeg) com cada perfil e mede frames por segundo do
+encode e tamanho do arquivo. A geração da fonte é medida à parte: é o
+teto de velocidade desta máquina, igual para todos os perfis. Uso:
+
+    python benchmarks/bench_encode.py [--duration 60] [--profiles draft standard archive] [--threads 0 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from dataclasses import replace
+from ffmpeg_utils import run_ffmpeg
+from render_settings import RenderSettings
+
+
+def synthetic_source(duration, width, height, fps):
+    """Entrada lavfi: padrão de teste em movimento + ruído temporal (não comprime trivialmente)"""
+    return [
+        "-f", "lavfi",
+        "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={duration},noise=alls=6:allf=t+u,format=yuv420p"
+    ]
+
+
+def measure(args, frames):
+    start = time.perf_counter()
+    run_ffmpeg(args)
+    elapsed = time.perf_counter() - start
+    return elapsed, frames / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=60.0, help="duração do reel sintético (s)")
+    parser.add_argument("--profiles", nargs="+", default=list(config.ENCODE_PROFILES))
+    parser.add_argument("--threads", nargs="+", type=int, default=[0],
+                        help="valores de threads do x264 a testar (0 = automático)")
+    args = parser.parse_args()
+
+    base = RenderSettings.final()
+    frames = int(args.duration * base.fps)
+    source = synthetic_source(args.duration, base.width, base.height, base.fps)
+    print(f"📊 Reel sintético: {base.width}x{base.height}, {args.duration:.0f}s, {frames} frames\n")
+
+    _, source_fps = measure(["-v", "error"] + source + ["-f", "null", "-"], frames)
+    print(f"   {'fonte (sem encode)':<28} {source_fps:8.1f} fps")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in args.profiles:
+            for threads in args.threads:
+                settings = replace(RenderSettings.final(name), threads=threads or RenderSettings.profile(name)['threads'])
+                output = os.path.join(work_dir, f"{name}_{threads}.mp4")
+                elapsed, fps = measure(["-v", "error"] + source + settings.encoder_args() + [output], frames)
+
+                size_mb = os.path.getsize(output) / (1024 * 1024)
+                kbps = os.path.getsize(output) * 8 / 1000 / args.duration
+                label = f"{name} (threads={threads or 'auto'})"
+                print(f"   {label:<28} {fps:8.1f} fps  {elapsed:7.1f} s  {size_mb:8.1f} MB  {kbps:8.0f} kbps")
+
+
+if __name__ == "__main__":
+    main()
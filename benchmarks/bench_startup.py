@@ -0,0 +1,90 @@
+"""Tempo de inicialização da CLI (import do main e `main.py --help`)
+
+Cada medição roda num processo novo do Python, como quando a CLI é chamada
+do terminal. Mostra a mediana das execuções, os módulos mais caros segundo
+`python -X importtime` e se alguma dependência pesada (MoviePy, OpenAI) foi
+carregada só por importar o main — elas devem ser importadas no primeiro
+uso. Uso:
+
+    python benchmarks/bench_startup.py [--runs 10] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Devem ficar de fora do import do main (só carregam quando usadas)
+HEAVY_MODULES = ("moviepy", "openai", "IPython")
+
+CASES = {
+    "import main": [sys.executable, "-c", "import main"],
+    "main.py --help": [sys.executable, "main.py", "--help"],
+}
+
+
+def time_command(command, runs):
+    """Mediana e mínimo (s) de `runs` execuções do comando num processo novo"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times)
+
+
+def import_costs(top):
+    """Tempo total do import do main e os imports diretos dele mais caros (`-X importtime`)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=ROOT, check=True, capture_output=True, text=True)
+    total = 0.0
+    costs = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", filhos indentados 2 espaços
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == "main":
+            total = int(cumulative) / 1e6
+        elif depth == 1:
+            # Cada import direto soma os filhos; os já carregados por outro não aparecem de novo
+            costs.append((name.strip(), int(cumulative) / 1e6))
+    return total, sorted(costs, key=lambda item: item[1], reverse=True)[:top]
+
+
+def loaded_heavy_modules():
+    """Dependências pesadas presentes em sys.modules depois de `import main`"""
+    code = f"import sys, main; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de inicialização da CLI")
+    parser.add_argument("--runs", type=int, default=10, help="execuções por caso (vale a mediana)")
+    parser.add_argument("--top", type=int, default=15, help="quantos imports mais caros listar")
+    args = parser.parse_args()
+
+    print(f"🚀 Inicialização ({args.runs} execuções, processo novo a cada uma)")
+    for name, command in CASES.items():
+        median, best = time_command(command, args.runs)
+        print(f"   {name:<20} mediana {median * 1000:7.1f} ms   melhor {best * 1000:7.1f} ms")
+
+    total, costs = import_costs(args.top)
+    print(f"\n📦 import main: {total * 1000:.1f} ms; imports mais caros (cumulativo):")
+    for name, seconds in costs:
+        print(f"   {name:<40} {seconds * 1000:7.1f} ms")
+
+    heavy = loaded_heavy_modules()
+    if heavy:
+        print(f"\n⚠️  Carregados só por importar o main: {', '.join(heavy)}")
+    else:
+        print(f"\n✅ Nenhuma dependência pesada carregada no import ({', '.join(HEAVY_MODULES)})")
+
+
+if __name__ == "__main__":
+    main()
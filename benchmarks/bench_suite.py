@@ -0,0 +1,334 @@
+"""Suíte de benchmarks com mídia sintética (reprodutível, sem rede)
+
+Gera a mídia de teste com o próprio ffmpeg, sem baixar nada: música com
+cliques num BPM conhecido sobre um tom contínuo e vídeos com padrão em
+movimento (testsrc2) e barras de cor (smptebars) em 1080p e 4K, todos com
+ruído de semente fixa. Depois cronometra os métodos públicos de
+AudioProcessor, VideoAnalyzer e VideoEditor (cada backend de renderização)
+e uma execução completa equivalente ao main(), com caches vazios.
+
+O resultado vai para um JSON (ambiente, parâmetros e o melhor tempo de cada
+caso); `--compare` mostra a variação em relação a uma execução anterior. Uso:
+
+    python benchmarks/bench_suite.py [--quick] [--resolutions 1080p 4k] [--groups audio video editor full]
+                                     [--backends moviepy ffmpeg stream chunked] [--output resultado.json]
+                                     [--compare anterior.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+import config
+from audio_processor import AudioProcessor
+from ffmpeg_utils import get_ffmpeg_exe, iter_frames, run_ffmpeg
+from render_settings import RenderSettings
+from video_analyzer import VideoAnalyzer
+from video_editor import VideoEditor
+
+# Muda quando os casos ou a mídia mudam (resultados de versões diferentes não são comparáveis)
+SUITE_VERSION = 1
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+PATTERNS = ("testsrc2", "smptebars")
+BACKENDS = ("moviepy", "ffmpeg", "stream", "chunked")
+GROUPS = ("audio", "video", "editor", "full")
+
+
+def synthetic_music(path, bpm, duration, sample_rate=44100):
+    """Clique de 30 ms a cada batida sobre um tom baixo contínuo (beats em tempos conhecidos)"""
+    beat = 60.0 / bpm
+    expression = f"0.8*sin(2*PI*1000*t)*lt(mod(t,{beat:.6f}),0.03)+0.15*sin(2*PI*220*t)"
+    run_ffmpeg([
+        "-v", "error", "-f", "lavfi",
+        "-i", f"aevalsrc='{expression}':s={sample_rate}:d={duration}",
+        "-ac", 2, "-c:a", "pcm_s16le", path
+    ])
+
+
+def synthetic_video(path, size, duration, fps, pattern, seed):
+    """Padrão do lavfi com ruído temporal de semente fixa, em H.264 com GOP de 2s"""
+    width, height = size
+    run_ffmpeg([
+        "-v", "error", "-f", "lavfi",
+        "-i", f"{pattern}=size={width}x{height}:rate={fps}:duration={duration},"
+              f"noise=alls=6:allf=t+u:all_seed={seed},format=yuv420p",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", 23, "-g", fps * 2, path
+    ])
+
+
+def synthetic_logo(path, size=400):
+    """Logo RGBA com transparência (círculo sobre fundo transparente)"""
+    y, x = np.mgrid[:size, :size]
+    inside = (x - size / 2) ** 2 + (y - size / 2) ** 2 < (size * 0.45) ** 2
+    rgba = np.zeros((size, size, 4), dtype=np.uint8)
+    rgba[inside] = (240, 200, 40, 255)
+    Image.fromarray(rgba).save(path)
+
+
+def build_media(media_dir, args):
+    """Gera (ou reaproveita) toda a mídia sintética; os nomes levam os parâmetros"""
+    media_dir = Path(media_dir)
+    media_dir.mkdir(parents=True, exist_ok=True)
+
+    music = media_dir / f"music_{args.bpm}bpm_{args.music_duration}s.wav"
+    if not music.exists():
+        synthetic_music(str(music), args.bpm, args.music_duration)
+
+    videos = {}
+    for resolution in args.resolutions:
+        size = RESOLUTIONS[resolution]
+        videos[resolution] = []
+        for i, pattern in enumerate(PATTERNS):
+            path = media_dir / f"{pattern}_{resolution}_{args.video_duration}s_seed{args.seed + i}.mp4"
+            if not path.exists():
+                print(f"   🎞️  Gerando {path.name}...")
+                synthetic_video(str(path), size, args.video_duration, 30, pattern, args.seed + i)
+            videos[resolution].append(str(path))
+
+    logo = media_dir / "logo.png"
+    if not logo.exists():
+        synthetic_logo(str(logo))
+    return str(music), videos, str(logo)
+
+
+class Suite:
+    """Executa os casos e guarda o melhor tempo de cada um"""
+
+    def __init__(self, repeat, verbose=False):
+        self.repeat = repeat
+        self.verbose = verbose
+        self.results = []
+
+    def case(self, name, function, repeat=None, **extra):
+        """Roda `function` `repeat` vezes; `extra` pode ter funções do resultado (ex.: fps)"""
+        best = float('inf')
+        result = None
+        for _ in range(repeat or self.repeat):
+            with self._quiet():
+                start = time.perf_counter()
+                result = function()
+                best = min(best, time.perf_counter() - start)
+
+        details = {key: (value(result, best) if callable(value) else value) for key, value in extra.items()}
+        self.results.append({'name': name, 'seconds': round(best, 4), **details})
+        shown = "  ".join(f"{key}={value}" for key, value in details.items())
+        print(f"   {name:<48} {best:9.3f} s  {shown}")
+        return result
+
+    def _quiet(self):
+        """Os métodos imprimem progresso; na suíte só interessa a tabela"""
+        if self.verbose:
+            return contextlib.nullcontext()
+        return contextlib.redirect_stdout(io.StringIO())
+
+
+def bench_audio(suite, music, bpm):
+    audio_proc = AudioProcessor(cache=None)
+    suite.case("audio.get_audio_duration", lambda: audio_proc.get_audio_duration(music))
+    suite.case("audio.find_best_segment", lambda: audio_proc.find_best_segment(music, target_duration=60))
+    suite.case("audio.get_music_intensity", lambda: audio_proc.get_music_intensity(music))
+    return suite.case(
+        "audio.detect_beats", lambda: audio_proc.detect_beats(music),
+        beats=lambda beats, _: len(beats),
+        bpm_expected=bpm,
+        bpm_detected=lambda beats, _: round(60.0 / float(np.median(np.diff(beats))), 1) if len(beats) > 1 else None
+    )
+
+
+def bench_video(suite, videos, resolution, video_duration):
+    analyzer = VideoAnalyzer(index=None, proxies=None)
+    video = videos[0]
+    suite.case(f"video.extract_frames[{resolution}]",
+               lambda: analyzer.extract_frames(video, config.SAMPLE_FRAMES, width=config.ANALYSIS_WIDTH))
+    suite.case(f"video.analyze_pattern[{resolution}]", lambda: analyzer.analyze_pattern(video))
+    suite.case(f"video.rank_videos[{resolution}]", lambda: analyzer.rank_videos(videos))
+    moments = []
+    for path in videos:
+        pattern = Path(path).name.split('_')[0]
+        moments.append(suite.case(
+            f"video.find_best_moments[{resolution},{pattern}]",
+            lambda path=path: analyzer.find_best_moments(path, target_duration=5),
+            source_fps=lambda _, seconds: round(video_duration * 30 / seconds, 1)
+        ))
+    return moments
+
+
+def bench_editor(suite, videos, moments, resolution, music, beats, logo, backends, work_dir):
+    audio_duration = 20.0
+    editor = VideoEditor(None, beats, music, audio_start=0, audio_duration=audio_duration, audio_cache=None)
+    best_clips = [
+        {'path': path, 'start': moment['start'], 'end': moment['end'], 'score': moment['score']}
+        for path, moment in zip(videos, moments) if moment
+    ] * 2  # 4 trechos alternando os padrões
+    timeline = suite.case(f"editor.plan_compilation[{resolution}]",
+                          lambda: editor.plan_compilation(best_clips, audio_duration))
+    timeline = replace(timeline, logo_path=logo)
+
+    settings = RenderSettings.final("draft")
+    frame = next(iter_frames(videos[0]))[1]
+    suite.case(f"editor.reels_frame[{resolution}] x30", lambda: [editor.reels_frame(frame, settings) for _ in range(30)])
+
+    for backend in backends:
+        output = os.path.join(work_dir, f"render_{resolution}_{backend}.mp4")
+        suite.case(
+            f"editor.render_timeline[{resolution},{backend}]",
+            lambda backend=backend, output=output: editor.render_timeline(timeline, output, replace(settings, backend=backend)),
+            repeat=1,
+            fps=lambda _, seconds: round(timeline.duration * settings.fps / seconds, 1)
+        )
+
+
+def bench_full(suite, videos, music, work_dir):
+    """Projeto novo (pastas vazias, caches frios) rodando o main() com o perfil draft"""
+    import main
+
+    project = Path(work_dir) / "project"
+    shutil.rmtree(project, ignore_errors=True)
+    for folder in (config.VIDEOS_DIR, config.MUSICA_DIR, config.PADRAO_DIR):
+        (project / folder).mkdir(parents=True)
+    for path in videos:
+        shutil.copy(path, project / config.VIDEOS_DIR)
+    shutil.copy(music, project / config.MUSICA_DIR)
+
+    cwd = os.getcwd()
+    os.chdir(project)
+    try:
+        suite.case("full.main[draft]", lambda: main.main(["--profile", "draft"]), repeat=1)
+    finally:
+        os.chdir(cwd)
+
+
+def environment():
+    def git_commit():
+        try:
+            return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+        except OSError:
+            return None
+
+    ffmpeg = subprocess.run([get_ffmpeg_exe(), "-version"], capture_output=True, text=True).stdout.split("\n")[0]
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'ffmpeg': ffmpeg,
+        'numpy': np.__version__,
+        'git_commit': git_commit(),
+    }
+
+
+def compare(results, previous_path):
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)
+    if previous.get('suite_version') != SUITE_VERSION:
+        print(f"\n⚠️  {previous_path} é de outra versão da suíte; comparação pode não fazer sentido")
+
+    before = {result['name']: result['seconds'] for result in previous['results']}
+    print(f"\n📈 Comparação com {previous_path}:")
+    for result in results:
+        if result['name'] not in before:
+            continue
+        ratio = result['seconds'] / before[result['name']] if before[result['name']] else float('inf')
+        mark = "🔴" if ratio > 1.1 else ("🟢" if ratio < 0.9 else "  ")
+        print(f"   {mark} {result['name']:<48} {before[result['name']]:9.3f} s -> {result['seconds']:9.3f} s  ({ratio:.2f}x)")
+
+
+def replace_resolutions(args):
+    """Mesmos parâmetros, só com 1080p (a execução completa sempre usa 1080p)"""
+    return argparse.Namespace(**{**vars(args), 'resolutions': ["1080p"]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="só 1080p, mídia curta e uma repetição")
+    parser.add_argument("--resolutions", nargs="+", choices=sorted(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--bpm", type=int, default=120, help="BPM da música sintética")
+    parser.add_argument("--music-duration", type=int, default=90, help="duração da música sintética (s)")
+    parser.add_argument("--video-duration", type=int, default=20, help="duração de cada vídeo sintético (s)")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições dos casos rápidos (vale o melhor tempo)")
+    parser.add_argument("--seed", type=int, default=0, help="semente do ruído dos vídeos e das escolhas aleatórias")
+    parser.add_argument("--media-dir", default=os.path.join(config.OUTPUT_DIR, "bench_media"),
+                        help="onde guardar a mídia sintética (reaproveitada entre execuções)")
+    parser.add_argument("--output", help="JSON com os resultados (padrão: output/bench/bench-<data>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="resultado anterior para comparar")
+    parser.add_argument("--verbose", action="store_true", help="mostra o progresso impresso pelos métodos")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.resolutions = ["1080p"]
+        args.music_duration = min(args.music_duration, 45)
+        args.video_duration = min(args.video_duration, 10)
+        args.repeat = 1
+
+    # Execuções comparáveis: sem IA, sem caches entre casos e com sementes fixas
+    config.USE_AI_ANALYSIS = False
+    config.SEGMENT_CACHE_ENABLED = False
+    config.RANDOM_SEED = args.seed
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+
+    print(f"📊 Suíte de benchmarks (v{SUITE_VERSION}): {', '.join(args.groups)} | {', '.join(args.resolutions)}\n")
+    music, videos, logo = build_media(args.media_dir, args)
+
+    suite = Suite(args.repeat, verbose=args.verbose)
+    work_dir = tempfile.mkdtemp(prefix="reels_bench_")
+    try:
+        beats = []
+        if "audio" in args.groups or "editor" in args.groups:
+            print(f"\n🎵 Áudio ({args.bpm} BPM, {args.music_duration}s)")
+            beats = bench_audio(suite, music, args.bpm)
+
+        for resolution in args.resolutions:
+            moments = None
+            if "video" in args.groups or "editor" in args.groups:
+                print(f"\n🔍 Análise [{resolution}]")
+                moments = bench_video(suite, videos[resolution], resolution, args.video_duration)
+            if "editor" in args.groups:
+                print(f"\n🎬 Edição [{resolution}]")
+                bench_editor(suite, videos[resolution], moments, resolution, music, beats, logo, args.backends, work_dir)
+
+        if "full" in args.groups:
+            print(f"\n🚀 Execução completa [1080p]")
+            full_videos = videos.get("1080p") or build_media(args.media_dir, replace_resolutions(args))[1]["1080p"]
+            bench_full(suite, full_videos, music, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'suite_version': SUITE_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'verbose')},
+        'results': suite.results,
+    }
+    output = args.output or os.path.join(config.OUTPUT_DIR, "bench", f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Resultados salvos em: {output}")
+
+    if args.compare:
+        compare(suite.results, args.compare)
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Confere a logo do backend "chunked" contra a renderização serial
+
+Renderiza a mesma timeline sintética (vários clipes por pedaço, fontes a
+25 e 24 fps numa saída de 15 fps, sem cache de trechos) com o
+StreamingRenderer e com o ChunkedRenderer e compara, frame a frame, o
+canto da logo durante o fade in/out. Frame repetido ou pulado na rampa
+aparece como diferença bem acima do ruído do encoder. Uso:
+
+    python benchmarks/check_logo_ramp.py [--workers 3] [--tolerance 3]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import config
+from bench_suite import synthetic_logo, synthetic_video
+from chunked_renderer import ChunkedRenderer
+from ffmpeg_utils import iter_frames
+from render_settings import RenderSettings
+from streaming_renderer import StreamingRenderer
+from timeline import Segment, Timeline
+
+
+def logo_corner(path):
+    """Média de cada frame no canto inferior direito (onde a logo entra)"""
+    means = []
+    for _, frame in iter_frames(path, gray=True):
+        height, width = frame.shape
+        means.append(float(frame[int(height * 0.85):, int(width * 0.7):].mean()))
+    return np.array(means)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3, help="pedaços em paralelo do ChunkedRenderer")
+    parser.add_argument("--tolerance", type=float, default=3.0, help="diferença máxima aceita (níveis de cinza)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="check_logo_")
+    try:
+        sources = []
+        for fps, pattern in ((25, "testsrc2"), (24, "smptebars")):
+            path = os.path.join(work_dir, f"{pattern}_{fps}.mp4")
+            synthetic_video(path, (640, 360), 8, fps, pattern, seed=fps)
+            sources.append(path)
+        logo = os.path.join(work_dir, "logo.png")
+        synthetic_logo(logo)
+
+        segments = [Segment(sources[0], 0.37, 2.9, 0.8), Segment(sources[1], 1.03, 3.37, 0.8),
+                    Segment(sources[0], 2.1, 4.9, 0.9)] * 2
+        timeline = Timeline(segments, logo_path=logo)
+        settings = RenderSettings.preview("draft")
+
+        ramps = {}
+        renderers = {
+            "stream": StreamingRenderer(settings),
+            "chunked": ChunkedRenderer(settings, workers=args.workers, min_chunk_seconds=1),
+        }
+        for name, renderer in renderers.items():
+            output = os.path.join(work_dir, f"{name}.mp4")
+            renderer.render(timeline, output)
+            ramps[name] = logo_corner(output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    stream, chunked = ramps["stream"], ramps["chunked"]
+    if len(stream) != len(chunked):
+        print(f"\n❌ Número de frames diferente: stream {len(stream)}, chunked {len(chunked)}")
+        sys.exit(1)
+
+    # Janela da logo: últimos LOGO_DURATION segundos e um frame antes
+    window = slice(len(stream) - int(round(config.LOGO_DURATION * settings.fps)) - 1, None)
+    diff = np.abs(stream[window] - chunked[window])
+    print(f"\n🎨 Logo ({len(diff)} frames): diferença máxima {diff.max():.1f}")
+    if diff.max() > args.tolerance:
+        frames = np.nonzero(diff > args.tolerance)[0] + window.start
+        print(f"❌ Rampa da logo diferente da renderização serial nos frames {frames.tolist()}")
+        print(f"   stream:  {np.round(stream[window]).astype(int).tolist()}")
+        print(f"   chunked: {np.round(chunked[window]).astype(int).tolist()}")
+        sys.exit(1)
+    print("✅ Rampa da logo idêntica à renderização serial")
+
+
+if __name__ == "__main__":
+    main()
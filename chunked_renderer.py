@@ -0,0 +1,220 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+import config
+import profiler
+from ffmpeg_renderer import FFmpegRenderer
+from ffmpeg_utils import run_ffmpeg
+from segment_cache import SegmentCache
+from streaming_renderer import StreamingRenderer
+
+
+class ChunkedRenderer(FFmpegRenderer):
+    """Renderiza a compilação em pedaços codificados em paralelo
+
+    A timeline é dividida em pedaços contíguos, sempre na fronteira entre
+    clipes, com números de frames parecidos. Cada pedaço é um processo do
+    ffmpeg independente (mesmos filtros e parâmetros de encoder do
+    FFmpegRenderer, sem áudio), então vários encoders rodam ao mesmo tempo.
+    No fim os pedaços são juntados pelo concat demuxer sem recodificar e a
+    música é adicionada uma única vez.
+
+    O número de frames de cada trecho é o mesmo do StreamingRenderer
+    (StreamingRenderer.frame_plan), então o tempo de cada corte é idêntico
+    ao da renderização serial. A logo fica sempre inteira no último pedaço.
+
+    Com um SegmentCache (`cache`), cada clipe vira um pedaço guardado em
+    disco: renderizar de novo depois de trocar um clipe ou a logo só
+    codifica as vagas que mudaram e junta o resto por cópia de stream.
+    Com `evict_cache=False` o limite de disco não é aplicado no fim da
+    renderização (quem renderiza em paralelo aplica uma vez no final).
+    """
+
+    def __init__(self, settings=None, workers=None, min_chunk_seconds=None, cache=None, evict_cache=True):
+        super().__init__(settings)
+        self.cache = cache
+        self.evict_cache = evict_cache
+        self.workers = workers or config.CHUNK_WORKERS
+        self.min_chunk_seconds = min_chunk_seconds if min_chunk_seconds is not None else config.CHUNK_MIN_SECONDS
+
+    def render(self, timeline, output_path):
+        """Gera o vídeo final da timeline e retorna a duração dele"""
+        if not timeline.segments:
+            raise ValueError("nenhum trecho para renderizar")
+
+        plan = StreamingRenderer(self.settings).frame_plan(timeline)
+        total_frames = sum(count for _, count in plan)
+        duration = total_frames / self.fps
+        logo_start = max(0, duration - config.LOGO_DURATION) if timeline.logo_path else None
+        if self.cache is not None:
+            # Com cache cada clipe é um pedaço: só as vagas que mudaram são codificadas de novo
+            chunks = [[item] for item in plan]
+        else:
+            chunks = self.split_plan(plan, logo_start)
+
+        work_dir = tempfile.mkdtemp(prefix="reels_chunks_")
+        paths = []
+        pending = {}  # caminho temporário -> (chunk, logo, chave do cache)
+        reused = 0
+        try:
+            first_frame = 0
+            for i, chunk in enumerate(chunks):
+                frames = sum(count for _, count in chunk)
+                chunk_logo = None
+                if logo_start is not None and logo_start < (first_frame + frames) / self.fps:
+                    chunk_logo = (timeline.logo_path, logo_start - first_frame / self.fps)
+                first_frame += frames
+
+                key = None
+                if self.cache is not None:
+                    key = self.cache.key(self.chunk_description(chunk, chunk_logo))
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        paths.append(cached)
+                        reused += 1
+                        continue
+                    # A mesma vaga repetida na timeline é codificada uma vez só
+                    path = self.cache.tmp_path(key)
+                else:
+                    path = os.path.join(work_dir, f"chunk_{i:03d}.mp4")
+                paths.append(path)
+                pending.setdefault(path, (chunk, chunk_logo, key))
+
+            if pending:
+                self._encode_chunks(pending)
+                if self.cache is not None:
+                    published = {path: self.cache.put(key, path) for path, (_, _, key) in pending.items()}
+                    paths = [published.get(path, path) for path in paths]
+
+            list_path = os.path.join(work_dir, "chunks.txt")
+            with open(list_path, 'w') as f:
+                for path in paths:
+                    f.write(f"file '{os.path.abspath(path)}'\n")
+            with profiler.stage("concat"):
+                run_ffmpeg(self.concat_command(list_path, timeline, duration, output_path))
+        finally:
+            if self.cache is not None:
+                for path in pending:
+                    Path(path).unlink(missing_ok=True)
+                if self.evict_cache:
+                    self.cache.evict(keep={Path(path).stem for path in paths})
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        if self.cache is not None:
+            print(f"   ♻️  Cache de trechos: {reused} reaproveitados, {len(chunks) - reused} codificados")
+        return duration
+
+    def _encode_chunks(self, pending):
+        """Codifica os pedaços em paralelo, dividindo os núcleos entre os encoders"""
+        workers = min(self.workers, len(pending))
+        settings = self.settings
+        if not settings.threads:
+            settings = replace(settings, threads=max(1, (os.cpu_count() or 1) // workers))
+
+        print(f"   🧩 {len(pending)} pedaços, {workers} em paralelo ({settings.threads} threads de encoder cada)")
+        commands = [self.chunk_command(chunk, logo, settings, path) for path, (chunk, logo, _) in pending.items()]
+        with profiler.stage("encode"), ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() propaga o primeiro erro de qualquer pedaço
+            list(pool.map(run_ffmpeg, commands))
+            profiler.count("frames_encoded", sum(count for chunk, _, _ in pending.values() for _, count in chunk))
+
+    def chunk_description(self, chunk, logo):
+        """Tudo o que define os frames codificados de um pedaço (base da chave do cache)
+
+        As threads do encoder ficam de fora: não mudam a imagem, só a velocidade.
+        """
+        logo_description = None
+        if logo is not None:
+            logo_path, logo_start = logo
+            logo_description = [SegmentCache.file_id(logo_path), round(logo_start, 6), config.LOGO_DURATION]
+        return {
+            'segments': [
+                [SegmentCache.file_id(segment.path), round(segment.start, 6), round(end, 6), segment.speed,
+                 self._reels_filter(info['size']), count]
+                for (segment, info, end), count in chunk
+            ],
+            'size': [self.width, self.height],
+            'fps': self.fps,
+            'encoder': replace(self.settings, threads=0).encoder_args(),
+            'logo': logo_description,
+        }
+
+    def split_plan(self, plan, logo_start=None):
+        """Agrupa os trechos do plano em até `workers` pedaços de tamanho parecido
+
+        Pedaços menores que `min_chunk_seconds` não compensam abrir outro
+        encoder. Se a logo aparece, o último pedaço começa antes dela.
+        """
+        total_frames = sum(count for _, count in plan)
+        min_frames = max(1, int(self.min_chunk_seconds * self.fps))
+        count = max(1, min(self.workers, len(plan), total_frames // min_frames))
+
+        chunks = [[]]
+        done = 0
+        for item in plan:
+            chunks[-1].append(item)
+            done += item[1]
+            if len(chunks) < count and done >= total_frames * len(chunks) / count:
+                chunks.append([])
+        if not chunks[-1]:
+            chunks.pop()
+
+        if logo_start is not None:
+            logo_frame = int(round(logo_start * self.fps))
+            while len(chunks) > 1 and total_frames - sum(c for _, c in chunks[-1]) > logo_frame:
+                last = chunks.pop()
+                chunks[-1].extend(last)
+        return chunks
+
+    def chunk_command(self, chunk, logo, settings, output_path):
+        """ffmpeg de um pedaço: trechos com o número exato de frames, sem áudio
+
+        `logo` é None ou (caminho, início da logo relativo ao pedaço).
+        """
+        inputs = []
+        filters = []
+        labels = []
+        frames = 0
+        for i, ((segment, info, end), count) in enumerate(chunk):
+            inputs += ["-ss", f"{segment.start:.6f}", "-t", f"{end - segment.start:.6f}", "-i", segment.path]
+            # tpad + trim: exatamente `count` frames, repetindo o último se o arquivo acabar antes
+            filters.append(
+                f"[{i}:v]setpts=(PTS-STARTPTS)/{segment.speed},{self._reels_filter(info['size'])},"
+                f"fps={self.fps},setsar=1,format=yuv420p,"
+                f"tpad=stop_mode=clone:stop={count},trim=end_frame={count}[v{i}]"
+            )
+            labels.append(f"[v{i}]")
+            frames += count
+
+        # Timestamps de volta na grade de frames: o concat sai com base de tempo de microssegundos
+        # (pts truncados), e a logo, sincronizada por timestamp, repetiria e pularia frames
+        filters.append(f"{''.join(labels)}concat=n={len(chunk)}:v=1:a=0,settb=1/{self.fps},setpts=N[joined]")
+        video_label = "[joined]"
+        if logo is not None:
+            logo_path, logo_start = logo
+            video_label = self._add_logo(inputs, filters, video_label, len(chunk), logo_path, logo_start)
+
+        return ["-v", "error"] + inputs + [
+            "-filter_complex", ";".join(filters),
+            "-map", video_label, "-an",
+            *settings.encoder_args(),
+            "-r", self.fps, "-frames:v", frames,
+            output_path
+        ]
+
+    def concat_command(self, list_path, timeline, duration, output_path):
+        """Junta os pedaços sem recodificar o vídeo e adiciona a música"""
+        inputs = ["-f", "concat", "-safe", "0", "-i", list_path]
+        maps = ["-map", "0:v:0", "-c:v", "copy"]
+        audio = timeline.audio
+        if audio is not None:
+            inputs += ["-ss", f"{audio.start:.6f}"]
+            if audio.duration:
+                inputs += ["-t", f"{audio.duration:.6f}"]
+            inputs += ["-i", audio.path]
+            maps += ["-map", "1:a:0", "-c:a", self.settings.audio_codec]
+
+        return ["-v", "error"] + inputs + maps + ["-t", f"{duration:.6f}", output_path]
@@ -13,6 +13,10 @@ PADRAO_DIR = "padrao"
 MUSICA_DIR = "musica"
 OUTPUT_DIR = "output"
 FINAL_DIR = "final"  # Pasta para logo
+CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")  # Caches de análise reaproveitados entre execuções
+TIMELINE_FILE = os.path.join(OUTPUT_DIR, "timeline.json")  # Plano da edição (renderizável com --timeline)
+METRICS_FILE = os.path.join(OUTPUT_DIR, "metrics.json")  # Medições por etapa (main.py --metrics)
+CPROFILE_DIR = os.path.join(OUTPUT_DIR, "profiles")  # .prof de cada etapa (main.py --cprofile)
 
 # Formato Reels
 REELS_WIDTH = 1080
@@ -25,9 +29,79 @@ MIN_CLIP_DURATION = 2.0  # segundos
 MAX_CLIP_DURATION = 6.0  # duração máxima de cada corte (6 segundos)
 MIN_MOMENT_DURATION = 3.0  # duração mínima de um momento extraído
 MAX_CLIPS_IN_COMPILATION = 15  # máximo de clipes no compilado final
+RANDOM_SEED = None  # semente da seleção aleatória de vídeos e dos cortes sem beats (None = diferente a cada execução)
 SLOW_MOTION_SPEED = 0.8  # velocidade do slow motion (0.8 = 80% da velocidade normal)
 LOGO_DURATION = 3.0  # duração da exibição do logo no final (segundos)
+BEAT_SYNC_CUTS = True  # ajusta a duração dos clipes da compilação para os cortes caírem nos beats
+CUT_SCORE_WEIGHT = 0.5  # quanto clipes com score maior ganham mais tempo no encaixe nos beats
+USE_PRECUT = True  # recorta cada trecho com ffmpeg antes da composição (só o início é recodificado)
+PRECUT_CRF = 16  # qualidade da parte recodificada no recorte (menor = melhor)
+RENDER_BACKEND = "moviepy"  # "moviepy" (padrão), "ffmpeg" (filter_complex nativo, bem mais rápido), "stream" (um vídeo aberto por vez, memória limitada) ou "chunked" (pedaços codificados em paralelo)
+FRAME_PIPELINE = True  # backend "moviepy": decodifica, recorta e codifica em paralelo (threads) em vez de write_videofile
+PIPELINE_DECODE_THREADS = 2  # clipes decodificados ao mesmo tempo (o próximo já começa enquanto o atual é escrito)
+PIPELINE_TRANSFORM_WORKERS = min(4, os.cpu_count() or 1)  # threads de recorte/redimensionamento/logo
+PIPELINE_QUEUE_FRAMES = 8  # frames decodificados em espera por clipe
+STREAM_QUEUE_FRAMES = 16  # frames na fila entre decodificação e encoder no backend "stream" (~6 MB cada em 1080x1920)
+CHUNK_WORKERS = max(1, (os.cpu_count() or 1) // 4)  # backend "chunked": pedaços codificados ao mesmo tempo (os núcleos são divididos entre eles)
+CHUNK_MIN_SECONDS = 5.0  # backend "chunked": pedaço mínimo (pedaços menores não compensam outro encoder)
+SEGMENT_CACHE_ENABLED = True  # backend "chunked": guarda cada clipe codificado em CACHE_DIR e só recodifica os que mudaram
+SEGMENT_CACHE_MAX_MB = 4096  # limite dos clipes codificados em disco (remove os menos usados)
+
+# Perfis de encode (main.py --profile; compare com benchmarks/bench_encode.py)
+# - crf: qualidade constante (tamanho varia) ou bitrate: taxa média fixa
+# - threads: threads do x264 (0 = automático); slices: fatias por frame (paraleliza dentro do frame)
+# - tune: ajuste do x264 para o tipo de conteúdo (None = nenhum)
+ENCODE_PROFILES = {
+    "draft": {"preset": "ultrafast", "crf": 28, "bitrate": None, "tune": "fastdecode", "threads": 0, "slices": None},
+    "standard": {"preset": "medium", "crf": None, "bitrate": "8000k", "tune": None, "threads": 0, "slices": None},
+    "archive": {"preset": "slow", "crf": 18, "bitrate": None, "tune": "film", "threads": 0, "slices": None},
+}
+ENCODE_PROFILE = "standard"  # perfil da versão final
+
+# Prévia (main.py --preview): mesma edição, pequena e rápida de gerar
+PREVIEW_WIDTH = 360
+PREVIEW_HEIGHT = 640
+PREVIEW_FPS = 15
+PREVIEW_PROFILE = "draft"  # perfil de encode da prévia
+PREVIEW_GOP = 15  # keyframe a cada 1s, para navegar na prévia sem travar
+PREVIEW_BACKEND = "ffmpeg"  # cai para o MoviePy se o ffmpeg falhar
+
+# Lote (main.py --batch manifesto.json)
+BATCH_RENDER_WORKERS = max(1, (os.cpu_count() or 1) // 4)  # reels renderizados ao mesmo tempo (o encoder já usa várias threads)
+
+# Proxies: cópias pequenas dos vídeos usadas na análise e na prévia (a versão final lê os originais)
+USE_PROXIES = True
+PROXY_SHORT_SIDE = 640  # lado menor do proxy em px (cobre a prévia 360x640 com recorte 9:16)
+PROXY_CRF = 23
+PROXY_GOP = 10  # keyframe a cada 10 frames: seeks e cortes baratos
+PROXY_PRESET = "veryfast"
+PROXY_CACHE_MAX_MB = 4096  # limite dos proxies em disco (remove os menos usados)
 
 # Análise de vídeo
 USE_AI_ANALYSIS = True  # True = usa IA (custa $), False = análise local (grátis)
 SAMPLE_FRAMES = 3  # número de frames para analisar por vídeo
+ANALYSIS_FPS = 2.0  # frames por segundo lidos na análise dos momentos (passada única e sequencial)
+ANALYSIS_WIDTH = 160  # largura (px) dos frames decodificados para análise
+ANALYSIS_KEYFRAMES_ONLY = False  # True = decodifica só keyframes (mais rápido, amostragem menos uniforme)
+COARSE_TO_FINE = True  # 1ª passada só em keyframes, depois amostragem densa só nos melhores segmentos
+COARSE_FPS = 1.0  # taxa da 1ª passada (limitada pelos keyframes disponíveis)
+REFINE_TOP_K = 3  # segmentos reavaliados com amostragem densa
+REFINE_MARGIN = 0.1  # também reavalia quem ficou a até 10% da nota do K-ésimo na 1ª passada
+MOTION_WEIGHT = 1.0  # peso do movimento (diferença média entre frames, escala 0-255) no score
+MOTION_NOISE_FLOOR = 3.0  # diferença por bloco abaixo disso é ruído, não movimento
+SCENE_CUT_THRESHOLD = 0.5  # mudança de histograma (0-1) a partir da qual há corte de cena
+SCENE_CUT_PENALTY = 0.7  # multiplica o score do trecho a cada corte de cena dentro dele
+ANALYSIS_WORKERS = min(8, os.cpu_count() or 1)  # vídeos analisados em paralelo (1 = sequencial)
+ANALYSIS_EXECUTOR = "thread"  # "thread" (padrão, o trabalho pesado é no ffmpeg) ou "process"
+ANALYSIS_INDEX_ENABLED = True  # reaproveita análises de vídeos que não mudaram (CACHE_DIR/analysis.sqlite)
+
+# Análise de áudio
+AUDIO_SINGLE_PASS = True  # True = decodifica a música uma vez só (rápido), False = uma decodificação por janela
+AUDIO_ANALYSIS_SAMPLE_RATE = 22050  # taxa de amostragem usada na análise de energia e de beats
+BEAT_CHUNK_SECONDS = 10.0  # tamanho dos blocos decodificados na detecção de beats
+AUDIO_CACHE_ENABLED = True  # guarda o áudio decodificado e as features em CACHE_DIR
+AUDIO_SAMPLE_RATE = 44100  # taxa do PCM em cache (também usado na música final)
+AUDIO_CACHE_MAX_MB = 2048  # limite do cache de áudio em disco (remove os menos usados)
+
+# Medições (main.py --metrics / --trace / --cprofile)
+CPROFILE_STAGES = ("find_best_segment", "find_best_moments", "render")  # etapas quentes perfiladas com --cprofile
@@ -0,0 +1,81 @@
+import numpy as np
+
+
+def cut_positions(beats, total_duration, frame_rate=30):
+    """Pontos onde um corte pode cair: 0, os beats do trecho e o fim da música
+
+    Os tempos são arredondados para a grade de frames, assim a duração de
+    cada clipe é um número inteiro de frames e os cortes não escorregam ao
+    longo do vídeo.
+    """
+    times = np.asarray(beats, dtype=np.float64)
+    times = times[(times > 0) & (times < total_duration)]
+    times = np.concatenate(([0.0], times, [total_duration]))
+    return np.unique(np.round(times * frame_rate) / frame_rate)
+
+
+def plan_cuts(clips, beats, total_duration, min_duration, max_duration, score_weight=0.5, frame_rate=30):
+    """Distribui os clipes entre os beats por programação dinâmica
+
+    - clips: lista de dicts {'start', 'end', 'score', 'speed'} na ordem da
+      compilação (tempos no vídeo de origem)
+    - beats: tempos dos beats relativos ao início da música
+    - total_duration: duração do trecho da música (o último corte pode cair aqui)
+    - min_duration/max_duration: limites de cada clipe no vídeo final; o
+      máximo também é limitado pelo que o momento tem disponível
+
+    Cada clipe ocupa um intervalo entre dois pontos de corte consecutivos da
+    solução; clipes podem ser descartados. O objetivo é cobrir a música
+    inteira, dando mais tempo aos clipes de score maior: cada segundo de um
+    clipe vale 1 + score_weight * score normalizado. Com P pontos de corte
+    e N clipes o custo é O(N * P²), vetorizado por clipe.
+
+    Retorna uma lista de (índice do clipe, início, fim) em tempo do vídeo
+    final, ou None se nenhum clipe couber entre os beats.
+    """
+    positions = cut_positions(beats, total_duration, frame_rate)
+    if len(clips) == 0 or len(positions) < 2:
+        return None
+
+    scores = np.array([clip.get('score') or 0.0 for clip in clips], dtype=np.float64)
+    if scores.max() > scores.min():
+        normalized = (scores - scores.min()) / (scores.max() - scores.min())
+    else:
+        normalized = np.ones_like(scores)
+    weights = 1.0 + score_weight * normalized
+
+    # spans[p, q] = duração de um clipe que vai do ponto p ao ponto q
+    spans = positions[None, :] - positions[:, None]
+    tolerance = 0.5 / frame_rate
+
+    best = np.full(len(positions), -np.inf)
+    best[0] = 0.0  # a compilação começa em 0
+    choices = []
+    for i, clip in enumerate(clips):
+        available = (clip['end'] - clip['start']) / clip.get('speed', 1.0)
+        upper = min(max_duration, available)
+        lower = min(min_duration, upper)
+        valid = (spans >= lower - tolerance) & (spans <= upper + tolerance)
+
+        candidates = np.where(valid, best[:, None] + weights[i] * spans, -np.inf)
+        start_point = candidates.argmax(axis=0)
+        used = candidates[start_point, np.arange(len(positions))]
+
+        # Usar o clipe só compensa se for melhor que pular ele
+        take = used > best
+        choices.append(np.where(take, start_point, -1))
+        best = np.where(take, used, best)
+
+    end_point = int(best.argmax())
+    if end_point == 0:
+        return None
+
+    plan = []
+    for i in range(len(clips) - 1, -1, -1):
+        start_point = choices[i][end_point]
+        if start_point < 0:
+            continue
+        plan.append((i, float(positions[start_point]), float(positions[end_point])))
+        end_point = start_point
+    plan.reverse()
+    return plan
@@ -0,0 +1,139 @@
+import config
+import profiler
+from ffmpeg_utils import probe_video, run_ffmpeg
+from render_settings import RenderSettings
+
+
+class FFmpegRenderer:
+    """Renderiza a compilação numa única chamada do ffmpeg (filter_complex)
+
+    Recebe a Timeline planejada pelo VideoEditor e traduz cada etapa da
+    edição para filtros nativos: corte pelo seek de entrada, velocidade com
+    setpts, recorte 9:16 com crop + scale, junção com concat e o logo com
+    overlay + fade. Nenhum frame
+    passa pelo Python, então o encoder roda na velocidade normal dele e usa
+    todos os núcleos.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or RenderSettings.final()
+        self.width = self.settings.width
+        self.height = self.settings.height
+        self.fps = self.settings.fps
+
+    def render(self, timeline, output_path):
+        """Gera o vídeo final da timeline e retorna a duração dele"""
+        args, duration = self.build_command(timeline, output_path)
+        with profiler.stage("encode"):
+            run_ffmpeg(args)
+            profiler.count("frames_encoded", int(round(duration * self.fps)))
+        return duration
+
+    def build_command(self, timeline, output_path):
+        """Argumentos do ffmpeg para a edição e a duração final esperada"""
+        clips = timeline.segments
+        if not clips:
+            raise ValueError("nenhum trecho para renderizar")
+
+        inputs = []
+        filters = []
+        labels = []
+        duration = 0.0
+
+        for i, clip in enumerate(clips):
+            info = probe_video(clip.path)
+            start = clip.start
+            end = min(clip.end, info['duration'])
+            speed = clip.speed
+
+            # Seek na entrada: o ffmpeg decodifica do keyframe anterior e descarta até `start`
+            inputs += ["-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", clip.path]
+            filters.append(
+                f"[{i}:v]setpts=(PTS-STARTPTS)/{speed},{self._reels_filter(info['size'])},"
+                f"fps={self.fps},setsar=1,format=yuv420p[v{i}]"
+            )
+            labels.append(f"[v{i}]")
+            duration += (end - start) / speed
+
+        max_duration = timeline.max_duration
+        if max_duration is not None and duration > max_duration:
+            print(f"   ✂️  Ajustando duração do vídeo final: {duration:.1f}s -> {max_duration:.1f}s")
+            duration = max_duration
+
+        filters.append(f"{''.join(labels)}concat=n={len(clips)}:v=1:a=0[joined]")
+        args = self._output_args(inputs, filters, "[joined]", len(clips), timeline, duration, output_path)
+        return args, duration
+
+    def _output_args(self, inputs, filters, video_label, next_index, timeline, duration, output_path):
+        """Completa o comando: logo, trilha de áudio e encoder
+
+        `video_label` é o vídeo já montado e `next_index` o índice da próxima
+        entrada do ffmpeg (logo e música entram depois dos vídeos).
+        """
+        inputs = list(inputs)
+        filters = list(filters)
+
+        logo_path = timeline.logo_path
+        if logo_path:
+            logo_start = max(0, duration - config.LOGO_DURATION)
+            video_label = self._add_logo(inputs, filters, video_label, next_index, logo_path, logo_start)
+            next_index += 1
+
+        maps = ["-map", video_label]
+        audio = timeline.audio
+        if audio is not None:
+            inputs += ["-ss", f"{audio.start:.6f}"]
+            if audio.duration:
+                inputs += ["-t", f"{audio.duration:.6f}"]
+            inputs += ["-i", audio.path]
+            maps += ["-map", f"{next_index}:a:0", "-c:a", self.settings.audio_codec]
+
+        return ["-v", "error"] + inputs + [
+            "-filter_complex", ";".join(filters),
+            *maps,
+            *self.settings.encoder_args(),
+            "-r", self.fps, "-t", f"{duration:.6f}",
+            output_path
+        ]
+
+    def _add_logo(self, inputs, filters, video_label, index, logo_path, logo_start):
+        """Acrescenta a entrada e o overlay da logo a partir de `logo_start`; retorna o novo rótulo do vídeo"""
+        margin = round(30 * self.settings.scale)
+        # Meio frame de folga no enable: logo_start arredondado a 6 casas pode cair logo depois do frame dele
+        inputs += ["-loop", "1", "-framerate", self.fps, "-t", config.LOGO_DURATION, "-i", logo_path]
+        filters.append(self._logo_filter(index, logo_start))
+        filters.append(
+            f"{video_label}[logo]overlay=x=W-w-{margin}:y=H-h-{margin}:eof_action=pass"
+            f":enable='gte(t,{max(0, logo_start) - 0.5 / self.fps:.6f})'[video]"
+        )
+        return "[video]"
+
+    def _reels_filter(self, size):
+        """crop + scale equivalentes ao VideoEditor.crop_to_reels"""
+        w, h = size
+        target_ratio = self.width / self.height
+
+        if w / h > target_ratio:
+            # Vídeo muito largo, corta os lados
+            crop = f"crop={int(h * target_ratio)}:{h}"
+        else:
+            # Vídeo muito alto, corta topo/base
+            crop = f"crop={w}:{int(w / target_ratio)}"
+        return f"{crop},scale={self.width}:{self.height}"
+
+    def _logo_filter(self, index, logo_start):
+        """Logo com 20% da largura, fade in/out de 0.3s, deslocada para os últimos segundos
+
+        `logo_start` negativo (a logo começou antes deste vídeo) descarta o
+        começo da logo em vez de deslocá-la.
+        """
+        fade_out = max(0, config.LOGO_DURATION - 0.3)
+        if logo_start >= 0:
+            shift = f"setpts=PTS-STARTPTS+round({logo_start:.6f}/TB)"
+        else:
+            shift = f"trim=start_frame={int(round(-logo_start * self.fps))},setpts=PTS-STARTPTS"
+        return (
+            f"[{index}:v]scale={int(self.width * 0.2)}:-1,format=rgba,"
+            f"fade=in:st=0:d=0.3:alpha=1,fade=out:st={fade_out}:d=0.3:alpha=1,"
+            f"{shift}[logo]"
+        )
@@ -0,0 +1,320 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+from functools import lru_cache
+import numpy as np
+import profiler
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.aac', '.ogg')
+
+
+def get_ffmpeg_exe():
+    """Retorna o caminho do executável do ffmpeg (o mesmo usado pelo MoviePy)"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def run_ffmpeg(args):
+    """Roda o ffmpeg com os argumentos dados; levanta RuntimeError se falhar
+
+    Retorna o stderr (onde o ffmpeg escreve logs e informações de filtros).
+    """
+    cmd = [get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-y"] + [str(arg) for arg in args]
+    profiler.count("ffmpeg_processes")
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = proc.stderr.decode(errors='ignore')
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg falhou ({proc.returncode}): {stderr.strip()[-500:]}")
+    return stderr
+
+
+@lru_cache(maxsize=None)
+def has_encoder(name):
+    """True se o ffmpeg disponível tem o encoder `name` (ex.: libx265)"""
+    proc = subprocess.run([get_ffmpeg_exe(), "-hide_banner", "-encoders"],
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return re.search(rf"^\s*V\S*\s+{re.escape(name)}\s", proc.stdout.decode(errors='ignore'), re.M) is not None
+
+
+def list_keyframes(path, start=0, duration=None):
+    """Tempos (absolutos, em segundos) dos keyframes a partir de `start`
+
+    Decodifica só os keyframes do intervalo, então é barato mesmo em 4K.
+    """
+    args = ["-skip_frame", "nokey"]
+    if start:
+        args += ["-ss", f"{start:.6f}"]
+    args += ["-i", path]
+    if duration is not None:
+        args += ["-t", f"{duration:.6f}"]
+    args += ["-an", "-sn", "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"]
+
+    stderr = run_ffmpeg(args)
+    times = [start + float(t) for t in re.findall(r"pts_time:\s*([-\d.]+)", stderr)]
+
+    # Com -skip_frame o -t não é exato: o último keyframe pode passar do fim
+    if duration is not None:
+        times = [t for t in times if t < start + duration]
+    return times
+
+
+def _audio_decode_cmd(path, sample_rate, channels, start, duration):
+    """Comando do ffmpeg que escreve PCM float32 intercalado no stdout"""
+    cmd = [get_ffmpeg_exe(), "-v", "error", "-nostdin"]
+    if start:
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += ["-i", path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.6f}"]
+    cmd += [
+        "-vn", "-ac", str(channels), "-ar", str(sample_rate),
+        "-f", "f32le", "-acodec", "pcm_f32le", "-"
+    ]
+    return cmd
+
+
+def decode_audio(path, sample_rate=44100, channels=1, start=0, duration=None):
+    """Decodifica o áudio inteiro (ou um trecho) em uma única passada do ffmpeg
+
+    Retorna um array float32 com shape (amostras,) se mono ou
+    (amostras, canais) caso contrário.
+    """
+    cmd = _audio_decode_cmd(path, sample_rate, channels, start, duration)
+    profiler.count("ffmpeg_processes")
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg falhou ao decodificar {path}: {proc.stderr.decode(errors='ignore').strip()}")
+
+    samples = np.frombuffer(proc.stdout, dtype=np.float32)
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+    return samples
+
+
+def iter_audio_chunks(path, sample_rate=22050, channels=1, chunk_seconds=10.0, start=0, duration=None):
+    """Decodifica o áudio em blocos de `chunk_seconds`, sem carregar a faixa inteira
+
+    Gera arrays float32 no mesmo formato de `decode_audio`.
+    """
+    cmd = _audio_decode_cmd(path, sample_rate, channels, start, duration)
+    frame_bytes = 4 * channels
+    chunk_bytes = int(chunk_seconds * sample_rate) * frame_bytes
+    profiler.count("ffmpeg_processes")
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        pending = b""
+        while True:
+            data = proc.stdout.read(chunk_bytes)
+            if not data:
+                break
+            data = pending + data
+            usable = len(data) - len(data) % frame_bytes
+            pending = data[usable:]
+
+            samples = np.frombuffer(data[:usable], dtype=np.float32)
+            if channels > 1:
+                samples = samples.reshape(-1, channels)
+            yield samples
+
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg falhou ao decodificar {path}: {stderr.decode(errors='ignore').strip()}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def load_moviepy():
+    """Módulo do MoviePy (moviepy.editor no v1), importado só no primeiro uso
+
+    O import do MoviePy leva quase um segundo (ele carrega até o IPython);
+    análise, prévia e renderização pelo ffmpeg não precisam dele.
+    """
+    try:
+        import moviepy.editor as moviepy
+    except ImportError:
+        import moviepy
+    return moviepy
+
+
+@lru_cache(maxsize=None)
+def get_ffprobe_exe():
+    """ffprobe ao lado do ffmpeg ou no PATH; None se não houver (o imageio-ffmpeg só traz o ffmpeg)"""
+    ffmpeg = get_ffmpeg_exe()
+    sibling = os.path.join(os.path.dirname(ffmpeg), "ffprobe" + (".exe" if ffmpeg.endswith(".exe") else ""))
+    if os.path.dirname(ffmpeg) and os.path.isfile(sibling):
+        return sibling
+    return shutil.which("ffprobe")
+
+
+def probe_media(path):
+    """Duração, trilhas e, se houver vídeo, fps, tamanho (já rotacionado), rotação e codec
+
+    Usa o ffprobe (JSON) quando disponível; senão lê o cabeçalho que o
+    `ffmpeg -i` imprime. Nenhum frame é decodificado e o MoviePy não é
+    carregado.
+    """
+    info = _ffprobe(path) if get_ffprobe_exe() else _ffmpeg_probe(path)
+
+    width, height = info['size']
+    if info['rotation'] in (90, 270, -90, -270):
+        info['size'] = [height, width]
+    return info
+
+
+def _ffprobe(path):
+    proc = subprocess.run(
+        [get_ffprobe_exe(), "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffprobe falhou em {path}: {proc.stderr.decode(errors='ignore').strip()[-500:]}")
+    data = json.loads(proc.stdout)
+
+    streams = data.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'
+                  and not s.get('disposition', {}).get('attached_pic')), None)
+    info = {
+        'duration': float(data.get('format', {}).get('duration') or 0.0) or None,
+        'has_video': video is not None,
+        'has_audio': any(s.get('codec_type') == 'audio' for s in streams),
+        'fps': None, 'size': [0, 0], 'rotation': 0, 'video_codec': None
+    }
+    if video is not None:
+        rate = video.get('avg_frame_rate', '0/0')
+        if rate in ('0/0', '0') or not rate:
+            rate = video.get('r_frame_rate', '0/0')
+        num, _, den = rate.partition('/')
+        # Mesmo sinal do MoviePy: a displaymatrix diz como girar para exibir, o contrário de "rotate"
+        rotation = video.get('tags', {}).get('rotate', 0)
+        for side_data in video.get('side_data_list', []):
+            if 'rotation' in side_data:
+                rotation = -float(side_data['rotation'])
+        info.update({
+            'fps': float(num) / float(den) if den and float(den) else None,
+            'size': [int(video['width']), int(video['height'])],
+            'rotation': int(float(rotation)),
+            'video_codec': video.get('codec_name')
+        })
+    return info
+
+
+def _ffmpeg_probe(path):
+    """Mesmas informações do cabeçalho do `ffmpeg -i` (sem saída: o ffmpeg sai com erro, é esperado)"""
+    proc = subprocess.run([get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-i", path],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = proc.stderr.decode(errors='ignore')
+    if "Input #0" not in stderr:
+        raise RuntimeError(f"ffmpeg não conseguiu ler {path}: {stderr.strip()[-500:]}")
+
+    duration = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", stderr)
+    video = re.search(r"Stream #0:\d+.*?: Video: (\w+).*?(\d{2,5})x(\d{2,5})[^\n]*", stderr)
+    info = {
+        'duration': (int(duration.group(1)) * 3600 + int(duration.group(2)) * 60 + float(duration.group(3)))
+                    if duration else None,
+        'has_video': video is not None,
+        'has_audio': re.search(r"Stream #0:\d+.*?: Audio:", stderr) is not None,
+        'fps': None, 'size': [0, 0], 'rotation': 0, 'video_codec': None
+    }
+    if video is not None:
+        # Como o MoviePy: "fps" se existir, senão "tbr"
+        rate = re.search(r"([\d.]+)(k?) fps", video.group(0)) or re.search(r"([\d.]+)(k?) tbr", video.group(0))
+        # Mesmo sinal do MoviePy: a displaymatrix diz como girar para exibir, o contrário de "rotate"
+        matrix = re.search(r"rotation of (-?[\d.]+) degrees", stderr)
+        rotate = re.search(r"rotate\s*:\s*(-?\d+)", stderr)
+        rotation = -float(matrix.group(1)) if matrix else (float(rotate.group(1)) if rotate else 0)
+        info.update({
+            'fps': float(rate.group(1)) * (1000 if rate.group(2) else 1) if rate else None,
+            'size': [int(video.group(2)), int(video.group(3))],
+            'rotation': int(round(rotation)),
+            'video_codec': video.group(1)
+        })
+    return info
+
+
+def probe_video(path):
+    """Duração, fps, tamanho (já rotacionado) e presença de áudio, sem abrir um VideoFileClip"""
+    info = probe_media(path)
+    if not info['has_video']:
+        raise RuntimeError(f"{path} não tem trilha de vídeo")
+
+    return {
+        'duration': info['duration'],
+        'fps': info['fps'],
+        'size': info['size'],
+        'rotation': info['rotation'],
+        'has_audio': info['has_audio'],
+        'video_codec': info['video_codec']
+    }
+
+
+def iter_frames(path, fps=None, width=None, gray=False, start=0, duration=None, keyframes_only=False,
+                drop_duplicates=False, info=None):
+    """Lê os frames em uma única passada sequencial, já reduzidos pelo ffmpeg
+
+    - fps: taxa de amostragem (None = todos os frames)
+    - width: largura de saída mantendo a proporção (None = tamanho original)
+    - gray: frames (H, W) em tons de cinza em vez de (H, W, 3) RGB
+    - keyframes_only: decodifica só keyframes (bem mais rápido em amostragens esparsas)
+    - drop_duplicates: pula frames idênticos ao anterior (o filtro fps repete o
+      último keyframe quando a taxa pedida é maior que a de keyframes)
+
+    Gera tuplas (tempo em segundos, frame uint8).
+    """
+    info = info or probe_video(path)
+    src_w, src_h = info['size']
+    if width:
+        out_w = max(2, int(width) // 2 * 2)
+        out_h = max(2, int(round(out_w * src_h / src_w / 2)) * 2)
+    else:
+        out_w, out_h = src_w, src_h
+
+    filters = []
+    if fps:
+        filters.append(f"fps={fps:.6f}")
+    if (out_w, out_h) != (src_w, src_h):
+        filters.append(f"scale={out_w}:{out_h}:flags=area")
+    pix_fmt = "gray" if gray else "rgb24"
+    filters.append(f"format={pix_fmt}")
+
+    cmd = [get_ffmpeg_exe(), "-v", "error", "-nostdin"]
+    if keyframes_only:
+        cmd += ["-skip_frame", "nokey"]
+    if start:
+        cmd += ["-ss", f"{start:.6f}"]
+    cmd += ["-i", path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.6f}"]
+    cmd += ["-an", "-sn", "-vf", ",".join(filters), "-f", "rawvideo", "-pix_fmt", pix_fmt, "-"]
+
+    shape = (out_h, out_w) if gray else (out_h, out_w, 3)
+    frame_bytes = out_w * out_h * (1 if gray else 3)
+    rate = fps or info['fps']
+
+    profiler.count("ffmpeg_processes")
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        index = 0
+        previous = None
+        while True:
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            profiler.count("frames_decoded")
+            if not (drop_duplicates and data == previous):
+                yield start + index / rate, np.frombuffer(data, dtype=np.uint8).reshape(shape)
+            previous = data
+            index += 1
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        proc.stdout.close()
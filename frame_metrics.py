@@ -0,0 +1,138 @@
+import numpy as np
+
+# Pesos BT.601 em ponto fixo (soma 256) para converter RGB em luminância
+_LUMA = (77, 150, 29)
+
+# Frames processados por vez: temporários pequenos, que cabem no cache da CPU
+_BATCH = 64
+
+
+def to_gray(frames):
+    """(N, H, W, 3) uint8 -> (N, H, W) uint8; frames já em cinza passam direto"""
+    frames = np.asarray(frames)
+    if frames.ndim == 3:
+        return frames
+
+    # Aritmética inteira em uint16: bem mais rápido que converter tudo para float
+    gray = frames[..., 0].astype(np.uint16)
+    gray *= _LUMA[0]
+    for channel in (1, 2):
+        weighted = frames[..., channel].astype(np.uint16)
+        weighted *= _LUMA[channel]
+        gray += weighted
+    gray >>= 8
+    return gray.astype(np.uint8)
+
+
+def block_motion(gray, block_size=8, noise_floor=3.0):
+    """Movimento entre frames consecutivos, por blocos
+
+    Calcula a diferença absoluta média em cada bloco `block_size` x
+    `block_size` e descarta blocos abaixo de `noise_floor` (ruído do sensor,
+    compressão). Retorna (N-1,) com a média por par de frames, na mesma
+    escala 0-255 dos pixels.
+    """
+    if len(gray) < 2:
+        return np.zeros(0, dtype=np.float32)
+
+    n, h, w = gray.shape
+    bh, bw = h // block_size, w // block_size
+    cropped = gray[:, :bh * block_size, :bw * block_size].astype(np.int16)
+    motion = np.empty(n - 1, dtype=np.float32)
+
+    for first in range(0, n - 1, _BATCH):
+        last = min(first + _BATCH, n - 1)
+        diff = np.abs(cropped[first + 1:last + 1] - cropped[first:last]).astype(np.float32)
+        blocks = diff.reshape(last - first, bh, block_size, bw, block_size).mean(axis=(2, 4))
+        blocks[blocks < noise_floor] = 0.0
+        motion[first:last] = blocks.mean(axis=(1, 2))
+
+    return motion
+
+
+def detect_scene_cuts(gray, threshold=0.5, bins=32):
+    """Marca os pares de frames consecutivos que atravessam um corte de cena
+
+    Compara histogramas de luminância normalizados (distância L1 / 2, entre
+    0 e 1); acima de `threshold` o conteúdo mudou demais para ser movimento.
+    Retorna (N-1,) bool.
+    """
+    if len(gray) < 2:
+        return np.zeros(0, dtype=bool)
+
+    n = len(gray)
+
+    # Um pixel a cada 2x2 basta para o histograma e corta 75% do trabalho
+    levels = np.asarray(gray)[:, ::2, ::2].reshape(n, -1).astype(np.int32) * bins // 256
+
+    # Um bincount só: cada frame ocupa sua própria faixa de `bins` posições
+    levels += (np.arange(n, dtype=np.int32) * bins)[:, None]
+    hist = np.bincount(levels.ravel(), minlength=n * bins).reshape(n, bins)
+    hist = hist / hist.sum(axis=1, keepdims=True)
+
+    distance = np.abs(np.diff(hist, axis=0)).sum(axis=1) / 2
+    return distance > threshold
+
+
+def frame_statistics(frames):
+    """Brilho (média) e contraste (desvio padrão) de cada frame, em lote"""
+    frames = np.asarray(frames)
+    n = len(frames)
+    flat = frames.reshape(n, -1)
+    brightness = np.empty(n)
+    contrast = np.empty(n)
+
+    for first in range(0, n, _BATCH):
+        batch = flat[first:first + _BATCH].astype(np.float32)
+        mean = batch.mean(axis=1, dtype=np.float64)
+        batch -= mean[:, None].astype(np.float32)
+        brightness[first:first + len(batch)] = mean
+        contrast[first:first + len(batch)] = np.sqrt(np.einsum('ij,ij->i', batch, batch) / batch.shape[1])
+
+    return brightness, contrast
+
+
+def score_segments(frames, segment_ids, num_segments, motion_weight=1.0, noise_floor=3.0,
+                   cut_threshold=0.5, cut_penalty=0.7):
+    """Pontua todos os segmentos de um vídeo numa chamada vetorizada
+
+    - frames: (N, H, W, 3) uint8 com as amostras em ordem de tempo
+    - segment_ids: (N,) segmento de cada amostra (-1 = fora de qualquer segmento)
+
+    Score de um segmento = média(brilho * 0.3 + contraste * 0.5) das amostras
+    + movimento médio * motion_weight, multiplicado por cut_penalty a cada
+    corte de cena dentro dele. Retorna um dict de arrays (num_segments,):
+    score (nan se o segmento não tem amostras), motion, scene_cuts e samples.
+    """
+    segment_ids = np.asarray(segment_ids)
+    brightness, contrast = frame_statistics(frames)
+    frame_scores = brightness * 0.3 + contrast * 0.5
+
+    inside = segment_ids >= 0
+    ids = segment_ids[inside]
+    samples = np.bincount(ids, minlength=num_segments)
+    frame_sum = np.bincount(ids, weights=frame_scores[inside], minlength=num_segments)
+
+    gray = to_gray(frames)
+    motion = block_motion(gray, noise_floor=noise_floor)
+    cuts = detect_scene_cuts(gray, threshold=cut_threshold)
+
+    # Só pares (j, j+1) com os dois frames no mesmo segmento
+    same = inside[:-1] & (segment_ids[:-1] == segment_ids[1:])
+    still = same & ~cuts
+    pair_ids = segment_ids[:-1]
+    scene_cuts = np.bincount(pair_ids[same & cuts], minlength=num_segments)
+    still_pairs = np.bincount(pair_ids[still], minlength=num_segments)
+    motion_sum = np.bincount(pair_ids[still], weights=motion[still], minlength=num_segments)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_frame = frame_sum / samples
+        mean_motion = np.where(still_pairs > 0, motion_sum / np.maximum(still_pairs, 1), 0.0)
+
+    score = (mean_frame + mean_motion * motion_weight) * cut_penalty ** scene_cuts
+    return {
+        'score': score,
+        'motion': mean_motion,
+        'scene_cuts': scene_cuts,
+        'samples': samples
+    }
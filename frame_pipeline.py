@@ -0,0 +1,111 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+# Marca o fim dos frames de uma fonte
+_DONE = object()
+
+
+def put_until_stopped(frames, item, stop):
+    """put numa fila limitada que desiste se o consumidor parou (não trava a thread para sempre)"""
+    while not stop.is_set():
+        try:
+            frames.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def drain(frames):
+    """Esvazia a fila para liberar a thread produtora"""
+    while True:
+        try:
+            frames.get_nowait()
+        except queue.Empty:
+            return
+
+
+class FramePipeline:
+    """Decodificação, transformação e encode de frames ao mesmo tempo
+
+    - decodificadores: uma thread por fonte (até `decode_threads` fontes
+      adiantadas), cada uma com sua fila limitada de frames
+    - transformação: `transform_workers` threads aplicam `transform` aos
+      frames (recorte, redimensionamento, logo...)
+    - escrita: a thread que chama `run` entrega os frames transformados a
+      `write` na ordem original, mesmo que terminem fora de ordem
+
+    A memória fica limitada pelas filas e pelo número de frames em
+    transformação, independente do tamanho do vídeo.
+    """
+
+    def __init__(self, decode_threads=None, transform_workers=None, queue_frames=None):
+        self.decode_threads = decode_threads or config.PIPELINE_DECODE_THREADS
+        self.transform_workers = transform_workers or config.PIPELINE_TRANSFORM_WORKERS
+        self.queue_frames = queue_frames or config.PIPELINE_QUEUE_FRAMES
+
+    def run(self, sources, transform, write):
+        """Processa as fontes em sequência e retorna quantos frames foram escritos
+
+        - sources: lista de funções sem argumentos que retornam um iterável de
+          frames (abrem e fecham a própria fonte)
+        - transform: transform(frame, índice global do frame) -> frame
+        - write: recebe os frames transformados, em ordem
+        """
+        queues = [queue.Queue(maxsize=self.queue_frames) for _ in sources]
+        stop = threading.Event()
+        max_in_flight = 2 * self.transform_workers
+        written = 0
+
+        with ThreadPoolExecutor(max_workers=self.decode_threads) as decoders, \
+                ThreadPoolExecutor(max_workers=self.transform_workers) as workers:
+            # O pool roda as fontes na ordem: a fonte sendo escrita sempre tem um decodificador
+            for source, frames in zip(sources, queues):
+                decoders.submit(self._decode, source, frames, stop)
+
+            pending = deque()
+            index = 0
+            try:
+                for frames in queues:
+                    while True:
+                        item = frames.get()
+                        if item is _DONE:
+                            break
+                        if isinstance(item, BaseException):
+                            raise item
+                        pending.append(workers.submit(transform, item, index))
+                        index += 1
+                        if len(pending) >= max_in_flight:
+                            write(pending.popleft().result())
+                            written += 1
+
+                while pending:
+                    write(pending.popleft().result())
+                    written += 1
+            finally:
+                stop.set()
+                for future in pending:
+                    future.cancel()
+                for frames in queues:
+                    drain(frames)
+
+        return written
+
+    def _decode(self, source, frames, stop):
+        iterator = None
+        try:
+            iterator = iter(source())
+            for frame in iterator:
+                if not put_until_stopped(frames, frame, stop):
+                    return
+            put_until_stopped(frames, _DONE, stop)
+        except Exception as e:
+            put_until_stopped(frames, e, stop)
+        finally:
+            # Fecha a fonte já, mesmo se a escrita parou no meio
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
@@ -0,0 +1,66 @@
+import numpy as np
+from PIL import Image
+import config
+
+# Duração do fade in/out da logo (segundos)
+FADE_DURATION = 0.3
+
+
+class LogoOverlay:
+    """Logo dos últimos segundos do reel, pré-calculada uma vez
+
+    A imagem é redimensionada para 20% da largura do vídeo e guardada já
+    multiplicada pelo alpha (float32), junto com o alpha e a rampa de fade
+    de cada frame da janela da logo. Aplicar a logo num frame é só uma
+    mistura na região do canto inferior direito; frames antes da janela
+    voltam sem nenhuma cópia.
+    """
+
+    def __init__(self, logo_path, video_duration, width, height, fps, margin=30, duration=None):
+        duration = duration if duration is not None else config.LOGO_DURATION
+        self.fps = fps
+
+        image = Image.open(logo_path).convert("RGBA")
+        logo_width = int(width * 0.2)
+        logo_height = max(1, round(image.height * logo_width / image.width))
+        rgba = np.asarray(image.resize((logo_width, logo_height), Image.Resampling.LANCZOS), dtype=np.float32)
+
+        self.alpha = rgba[..., 3:] / 255.0
+        self.premultiplied = rgba[..., :3] * self.alpha
+
+        # Canto inferior direito com margem (recortado se a logo não couber)
+        self.x = max(0, width - logo_width - margin)
+        self.y = max(0, height - logo_height - margin)
+        self.alpha = self.alpha[:height - self.y, :width - self.x]
+        self.premultiplied = self.premultiplied[:height - self.y, :width - self.x]
+
+        # Janela da logo e opacidade de cada frame dela (fade in e fade out)
+        self.start = max(0.0, video_duration - duration)
+        self.end = self.start + duration
+        local = np.arange(int(np.ceil(duration * fps))) / fps
+        self.ramp = np.clip(np.minimum(local, duration - local) / FADE_DURATION, 0.0, 1.0).astype(np.float32)
+
+    @classmethod
+    def for_settings(cls, logo_path, video_duration, settings):
+        return cls(logo_path, video_duration, settings.width, settings.height, settings.fps,
+                   margin=round(30 * settings.scale))
+
+    def opacity(self, t):
+        """Opacidade da logo no instante t do vídeo (0 fora da janela)"""
+        if t < self.start or t >= self.end:
+            return 0.0
+        index = min(int(round((t - self.start) * self.fps)), len(self.ramp) - 1)
+        return float(self.ramp[index])
+
+    def apply(self, frame, t):
+        """Frame com a logo no instante t; fora da janela retorna o próprio frame"""
+        opacity = self.opacity(t)
+        if opacity <= 0.0:
+            return frame
+
+        h, w = self.alpha.shape[:2]
+        out = np.array(frame, copy=True)
+        region = out[self.y:self.y + h, self.x:self.x + w].astype(np.float32)
+        blended = region * (1.0 - opacity * self.alpha) + opacity * self.premultiplied
+        out[self.y:self.y + h, self.x:self.x + w] = np.clip(blended + 0.5, 0, 255).astype(np.uint8)
+        return out
@@ -0,0 +1,51 @@
+"""Diretório de cache com limite de tamanho e remoção LRU
+
+Usado pelo AudioCache, ProxyCache e SegmentCache. Cada entrada é o grupo
+de arquivos com o mesmo prefixo antes do primeiro ponto (`<chave>.pcm` e
+`<chave>.json`, ou só `<chave>.mp4`); o mtime marca o último uso e
+arquivos temporários (`.tmp`) ainda em escrita nunca contam.
+"""
+import os
+
+
+def touch(file_path):
+    """Marca o arquivo como usado agora (base da remoção LRU)"""
+    try:
+        os.utime(file_path)
+    except OSError:
+        pass
+
+
+def _is_tmp(name):
+    return name.endswith('.tmp') or '.tmp.' in name
+
+
+def evict(cache_dir, max_bytes, keep=(), pattern="*"):
+    """Remove as entradas usadas há mais tempo até o diretório caber em `max_bytes`
+
+    As chaves em `keep` nunca saem. Retorna as chaves removidas.
+    """
+    groups = {}
+    for file_path in cache_dir.glob(pattern):
+        if _is_tmp(file_path.name):
+            continue
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            continue
+        key = file_path.name.split('.', 1)[0]
+        size, last_used, paths = groups.get(key, (0, 0, []))
+        groups[key] = (size + stat.st_size, max(last_used, stat.st_mtime), paths + [file_path])
+
+    evicted = []
+    total = sum(size for size, _, _ in groups.values())
+    for key, (size, _, paths) in sorted(groups.items(), key=lambda item: item[1][1]):
+        if total <= max_bytes:
+            break
+        if key in keep:
+            continue
+        for file_path in paths:
+            file_path.unlink(missing_ok=True)
+        evicted.append(key)
+        total -= size
+    return evicted
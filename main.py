@@ -1,10 +1,21 @@
+import argparse
+import json
+import multiprocessing
 import os
 import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from video_analyzer import VideoAnalyzer
+from analysis_index import AnalysisIndex
 from audio_processor import AudioProcessor
+from audio_cache import AudioCache
 from video_editor import VideoEditor
+from timeline import Timeline
+from render_settings import RenderSettings
+from proxy_cache import ProxyCache
+from segment_cache import SegmentCache
 import config
+import profiler
 
 def setup_directories():
     """Cria as pastas necessárias"""
@@ -31,12 +42,341 @@ def get_audio_files(directory):
     
     return [str(f) for f in files]
 
-def main():
+def create_analyzer():
+    """Analisador com o índice persistente e os proxies, se habilitados"""
+    index = AnalysisIndex() if config.ANALYSIS_INDEX_ENABLED else None
+    proxies = ProxyCache() if config.USE_PROXIES else None
+    return VideoAnalyzer(index=index, proxies=proxies)
+
+def _find_best_moment(video_path, target_duration):
+    """Worker de processo: cada processo cria seu próprio analisador"""
+    return create_analyzer().find_best_moments(video_path, target_duration)
+
+def _report_moment(i, total, video_path, moment, error=None):
+    print(f"   [{i}/{total}] {Path(video_path).name}")
+    if error is not None:
+        print(f"      ⚠️  Erro ao analisar: {error}")
+    elif moment:
+        print(f"      ✓ Momento: {moment['start']:.1f}s - {moment['end']:.1f}s (score: {moment['score']:.1f})")
+
+def analysis_executor(analyzer, workers=None):
+    """Pool da análise de momentos e a função que cada worker roda"""
+    workers = workers or config.ANALYSIS_WORKERS
+    
+    # Threads bastam: o tempo é gasto quase todo no ffmpeg, fora do GIL
+    if config.ANALYSIS_EXECUTOR == "process":
+        return ProcessPoolExecutor(max_workers=workers), _find_best_moment
+    return ThreadPoolExecutor(max_workers=workers), analyzer.find_best_moments
+
+def collect_moments(video_paths, futures):
+    """Resultados das análises na ordem de entrada (None onde a análise falhou)"""
+    moments = []
+    
+    # Coleta na ordem de entrada: resultado determinístico independente de quem termina primeiro
+    for i, (video_path, future) in enumerate(zip(video_paths, futures), 1):
+        try:
+            moment = future.result()
+            _report_moment(i, len(video_paths), video_path, moment)
+        except Exception as e:
+            moment = None
+            _report_moment(i, len(video_paths), video_path, None, e)
+        moments.append(moment)
+    
+    return moments
+
+def extract_best_moments(analyzer, video_paths, target_duration, workers=None):
+    """Extrai o melhor momento de cada vídeo, em paralelo se configurado
+    
+    Retorna uma lista na mesma ordem de `video_paths` com o momento de cada
+    vídeo, ou None se a análise falhou (o erro de um vídeo não afeta os outros).
+    """
+    workers = workers or config.ANALYSIS_WORKERS
+    
+    if workers <= 1 or len(video_paths) <= 1:
+        moments = []
+        for i, video_path in enumerate(video_paths, 1):
+            try:
+                moment = analyzer.find_best_moments(video_path, target_duration)
+                _report_moment(i, len(video_paths), video_path, moment)
+            except Exception as e:
+                moment = None
+                _report_moment(i, len(video_paths), video_path, None, e)
+            moments.append(moment)
+        return moments
+    
+    executor, find_best_moment = analysis_executor(analyzer, workers)
+    with executor:
+        futures = [executor.submit(find_best_moment, video_path, target_duration) for video_path in video_paths]
+        return collect_moments(video_paths, futures)
+
+def analyze_music(audio_proc, custom_audio):
+    """Melhor trecho da música e os beats dele: (início, duração, beats)"""
+    full_audio_duration = audio_proc.get_audio_duration(custom_audio)
+    print(f"   Duração total da música: {full_audio_duration:.1f}s")
+    
+    # Encontra o melhor trecho da música
+    print(f"\n🎵 Procurando melhor trecho da música...")
+    with profiler.stage("find_best_segment"):
+        best_segment = audio_proc.find_best_segment(custom_audio, target_duration=60)
+    
+    if best_segment:
+        print(f"   ✓ Melhor trecho encontrado: {best_segment['start']:.1f}s - {best_segment['end']:.1f}s")
+        # Música mais curta que o alvo: o trecho é a faixa inteira, sem energia calculada
+        energy = f" (energia: {best_segment['avg_energy']:.3f})" if 'avg_energy' in best_segment else ""
+        print(f"   ✓ Duração: {best_segment['duration']:.1f}s{energy}")
+        audio_start = best_segment['start']
+        audio_duration = best_segment['duration']
+    else:
+        print(f"   ⚠️  Não foi possível encontrar melhor trecho, usando música completa")
+        audio_start = 0
+        audio_duration = full_audio_duration
+    
+    # Detecta beats só no trecho selecionado (tempos já começam em 0)
+    with profiler.stage("detect_beats"):
+        beats = audio_proc.detect_beats(custom_audio, start=audio_start, duration=audio_duration)
+    print(f"   Encontrados {len(beats)} pontos de corte no trecho selecionado")
+    return audio_start, audio_duration, beats
+
+def select_videos(input_videos):
+    """Se tem muitos vídeos, seleciona aleatoriamente"""
+    if len(input_videos) > config.MAX_CLIPS_IN_COMPILATION:
+        print(f"\n⚡ Muitos vídeos! Selecionando {config.MAX_CLIPS_IN_COMPILATION} aleatoriamente...")
+        # Ordena antes: com RANDOM_SEED a seleção não depende da ordem do sistema de arquivos
+        rng = random.Random(config.RANDOM_SEED)
+        return rng.sample(sorted(input_videos), config.MAX_CLIPS_IN_COMPILATION)
+    return input_videos
+
+def clips_from_moments(video_paths, moments):
+    """Clipes da compilação a partir do melhor momento de cada vídeo"""
+    best_clips = []
+    for video_path, best_moment in zip(video_paths, moments):
+        if best_moment:
+            best_clips.append({
+                'path': video_path,
+                'start': best_moment['start'],
+                'end': best_moment['end'],
+                'score': best_moment['score']
+            })
+    return best_clips
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Church Reels Editor - Compilação Automática")
+    parser.add_argument("--plan-only", action="store_true",
+                        help="só analisa e salva o plano da edição (timeline JSON), sem renderizar")
+    parser.add_argument("--timeline", metavar="JSON",
+                        help="renderiza um plano salvo, sem analisar vídeos nem música de novo")
+    parser.add_argument("--preview", action="store_true",
+                        help="gera uma prévia rápida em baixa resolução (reel_preview.mp4) em vez da versão final")
+    parser.add_argument("--profile", choices=sorted(config.ENCODE_PROFILES),
+                        help=f"perfil de encode (padrão: {config.ENCODE_PROFILE}; na prévia, {config.PREVIEW_PROFILE})")
+    parser.add_argument("--batch", metavar="MANIFESTO",
+                        help="gera vários reels a partir de um manifesto JSON (música + pasta de vídeos + saída)")
+    parser.add_argument("--metrics", nargs="?", const=config.METRICS_FILE, metavar="JSON",
+                        help=f"salva tempo, contadores e pico de memória de cada etapa (padrão: {config.METRICS_FILE})")
+    parser.add_argument("--trace", metavar="JSON",
+                        help="salva as etapas no formato de trace do Chrome (chrome://tracing ou Perfetto)")
+    parser.add_argument("--cprofile", action="store_true",
+                        help=f"roda o cProfile nas etapas {', '.join(config.CPROFILE_STAGES)} (.prof em {config.CPROFILE_DIR}/)")
+    return parser.parse_args(argv)
+
+def render_saved_timeline(timeline_path, output_path, settings, evict_segments=True):
+    """Renderiza uma timeline salva por uma execução anterior (ou por outra máquina)
+    
+    `evict_segments=False` deixa o limite do cache de trechos para quem chamou
+    (no lote, outro processo pode estar usando um trecho que seria removido).
+    """
+    print(f"\n📄 Carregando plano: {timeline_path}")
+    timeline = Timeline.load(timeline_path)
+    print(f"   {len(timeline.segments)} clipes, {timeline.duration:.1f}s")
+    
+    audio_cache = AudioCache() if config.AUDIO_CACHE_ENABLED else None
+    custom_audio = timeline.audio.path if timeline.audio else None
+    proxies = ProxyCache() if config.USE_PROXIES else None
+    editor = VideoEditor(None, timeline.beats, custom_audio, audio_cache=audio_cache, proxies=proxies,
+                         evict_segments=evict_segments)
+    
+    print(f"\n🎬 Renderizando compilação...")
+    editor.render_timeline(timeline, output_path, settings)
+
+def load_manifest(manifest_path):
+    """Jobs do manifesto: lista (ou {"jobs": [...]}) de {"music", "videos", "output"}
+    
+    `videos` é uma pasta; `output` é relativo a OUTPUT_DIR (padrão: nome da
+    pasta, com sufixo _2, _3... se outra pasta tiver o mesmo nome). Duas
+    saídas explícitas iguais são um erro: um reel sobrescreveria o outro.
+    """
+    with open(manifest_path, encoding='utf-8') as f:
+        data = json.load(f)
+    
+    jobs = data['jobs'] if isinstance(data, dict) else data
+    for i, job in enumerate(jobs, 1):
+        missing = [key for key in ('music', 'videos') if key not in job]
+        if missing:
+            raise ValueError(f"job {i} do manifesto sem {', '.join(missing)}")
+    
+    # Explícitas primeiro, para um nome padrão nunca tomar o lugar de uma saída pedida
+    used = {}
+    for i, job in enumerate(jobs, 1):
+        if 'output' in job:
+            key = os.path.normpath(job['output'])
+            if key in used:
+                raise ValueError(f"jobs {used[key]} e {i} do manifesto com a mesma saída '{job['output']}'")
+            used[key] = i
+    for i, job in enumerate(jobs, 1):
+        if 'output' not in job:
+            name = Path(job['videos']).name
+            output = f"{name}.mp4"
+            suffix = 2
+            while os.path.normpath(output) in used:
+                output = f"{name}_{suffix}.mp4"
+                suffix += 1
+            job['output'] = output
+            used[os.path.normpath(output)] = i
+    return jobs
+
+def run_batch(manifest_path, settings, plan_only=False):
+    """Gera um reel por job do manifesto
+    
+    A música de cada job é analisada primeiro (rápido, com cache); depois a
+    análise dos vídeos de todos os jobs vai para um único pool, então os
+    núcleos ficam ocupados mesmo com poucos vídeos por job. Cada plano
+    pronto é salvo e renderizado num pool de processos separado enquanto os
+    próximos jobs ainda são analisados. Índice, cache de áudio e proxies
+    são os mesmos para todos os jobs. Retorna {saída: erro ou None}.
+    """
+    jobs = load_manifest(manifest_path)
+    print(f"\n📦 Lote com {len(jobs)} reel(s): {manifest_path}")
+    
+    analyzer = create_analyzer()
+    audio_cache = AudioCache() if config.AUDIO_CACHE_ENABLED else None
+    audio_proc = AudioProcessor(cache=audio_cache)
+    proxies = ProxyCache() if config.USE_PROXIES else None
+    analysis_pool, find_best_moment = analysis_executor(analyzer)
+    # spawn, não fork: um fork herdaria os pipes dos ffmpeg da análise em andamento,
+    # e quem lê esses pipes nunca veria o fim do arquivo
+    render_pool = ProcessPoolExecutor(max_workers=config.BATCH_RENDER_WORKERS,
+                                      mp_context=multiprocessing.get_context("spawn"))
+    
+    results = {}
+    renders = {}
+    with analysis_pool, render_pool:
+        # 1) Música de cada job e envio de todas as análises de vídeo para o pool
+        pending = []
+        for job in jobs:
+            output_path = os.path.join(config.OUTPUT_DIR, job['output'])
+            if settings.width < config.REELS_WIDTH:
+                output_path = str(Path(output_path).with_name(f"{Path(output_path).stem}_preview.mp4"))
+            
+            print(f"\n🎵 [{job['output']}] {Path(job['music']).name} + {job['videos']}/")
+            try:
+                input_videos = get_video_files(job['videos'])
+                if not input_videos:
+                    raise ValueError(f"nenhum vídeo em '{job['videos']}/'")
+                audio_start, audio_duration, beats = analyze_music(audio_proc, job['music'])
+            except Exception as e:
+                print(f"   ❌ {e}")
+                results[output_path] = e
+                continue
+            
+            selected_videos = select_videos(input_videos)
+            target_clip_duration = min(audio_duration / len(selected_videos), 12)
+            futures = [analysis_pool.submit(find_best_moment, video_path, target_clip_duration)
+                       for video_path in selected_videos]
+            pending.append((job, output_path, audio_start, audio_duration, beats, selected_videos, futures))
+        
+        # 2) Planeja cada job assim que as análises dele terminam e manda renderizar
+        for job, output_path, audio_start, audio_duration, beats, selected_videos, futures in pending:
+            print(f"\n🔍 [{job['output']}] Momentos de {len(selected_videos)} vídeo(s)...")
+            best_clips = clips_from_moments(selected_videos, collect_moments(selected_videos, futures))
+            if not best_clips:
+                print(f"   ❌ Não foi possível extrair momentos dos vídeos")
+                results[output_path] = RuntimeError("nenhum momento extraído")
+                continue
+            
+            # Um job com problema não derruba o lote nem as renderizações já enviadas
+            try:
+                editor = VideoEditor(None, beats, job['music'], audio_start=audio_start, audio_duration=audio_duration,
+                                     audio_cache=audio_cache, proxies=proxies)
+                timeline = editor.plan_compilation(best_clips, audio_duration)
+                timeline_path = str(Path(output_path).with_suffix('.json'))
+                timeline.save(timeline_path)
+                print(f"   📄 Plano salvo em: {timeline_path}")
+                
+                if plan_only:
+                    results[output_path] = None
+                else:
+                    renders[output_path] = render_pool.submit(render_saved_timeline, timeline_path, output_path,
+                                                              settings, False)
+            except Exception as e:
+                print(f"   ❌ {e}")
+                results[output_path] = e
+        
+        # 3) Espera as renderizações
+        for output_path, future in renders.items():
+            try:
+                future.result()
+                results[output_path] = None
+            except Exception as e:
+                print(f"   ❌ Falha ao renderizar {output_path}: {e}")
+                results[output_path] = e
+    
+    # Os workers não limitam o cache de trechos (um apagaria o que outro ainda vai juntar)
+    if renders and config.SEGMENT_CACHE_ENABLED:
+        SegmentCache().evict()
+    
+    return results
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not (args.metrics or args.trace or args.cprofile):
+        run(args)
+        return
+    
+    run_profiler = profiler.enable(cprofile=args.cprofile)
+    try:
+        with profiler.stage("main"):
+            run(args)
+    finally:
+        run_profiler.stop()
+        print()
+        if args.metrics:
+            run_profiler.save_json(args.metrics)
+            print(f"📊 Métricas salvas em: {args.metrics}")
+        if args.trace:
+            run_profiler.save_chrome_trace(args.trace)
+            print(f"📊 Trace salvo em: {args.trace}")
+        for path in run_profiler.save_cprofile(config.CPROFILE_DIR):
+            print(f"📊 cProfile salvo em: {path}")
+
+def run(args):
     print("🎬 Church Reels Editor - Compilação Automática")
     print("=" * 50)
     
     # Setup
     setup_directories()
+    if args.preview:
+        settings = RenderSettings.preview(args.profile)
+        output_path = os.path.join(config.OUTPUT_DIR, "reel_preview.mp4")
+        print(f"👀 Modo prévia: {settings.width}x{settings.height}, {settings.fps} fps")
+    else:
+        settings = RenderSettings.final(args.profile)
+        output_path = os.path.join(config.OUTPUT_DIR, "reel_compilado.mp4")
+        print(f"🎛️  Perfil de encode: {args.profile or config.ENCODE_PROFILE}")
+    
+    if args.batch:
+        results = run_batch(args.batch, settings, plan_only=args.plan_only)
+        print("\n" + "=" * 50)
+        for path, error in results.items():
+            print(f"{'❌' if error else '✅'} {path}" + (f": {error}" if error else ""))
+        print(f"📦 {sum(error is None for error in results.values())}/{len(results)} reel(s) concluído(s)")
+        return
+    
+    if args.timeline:
+        render_saved_timeline(args.timeline, output_path, settings)
+        print("\n" + "=" * 50)
+        print(f"✅ Compilação concluída!")
+        print(f"📁 Vídeo salvo em: {output_path}")
+        return
     
     # Verifica configuração de IA
     if config.USE_AI_ANALYSIS:
@@ -53,15 +393,16 @@ def main():
     
     if padrao_videos:
         print(f"\n📋 Analisando padrão: {padrao_videos[0]}")
-        analyzer = VideoAnalyzer()
-        pattern = analyzer.analyze_pattern(padrao_videos[0])
+        analyzer = create_analyzer()
+        with profiler.stage("analyze_pattern"):
+            pattern = analyzer.analyze_pattern(padrao_videos[0])
         print(f"   Duração: {pattern['duration']:.1f}s")
         print(f"   FPS: {pattern['fps']}")
     else:
         print("\n⚠️  Nenhum vídeo padrão encontrado em 'padrao/'")
         print("   Usando configurações padrão...")
         pattern = {"duration": 30, "fps": 30}
-        analyzer = VideoAnalyzer()
+        analyzer = create_analyzer()
     
     # Verifica músicas customizadas
     musicas = get_audio_files(config.MUSICA_DIR)
@@ -84,73 +425,49 @@ def main():
     
     print(f"\n🎥 Encontrados {len(input_videos)} vídeo(s) para compilar")
     
-    # Processa áudio
-    audio_proc = AudioProcessor()
-    full_audio_duration = audio_proc.get_audio_duration(custom_audio)
-    print(f"   Duração total da música: {full_audio_duration:.1f}s")
+    # Processa áudio (a música é decodificada uma vez e reaproveitada no editor)
+    audio_cache = AudioCache() if config.AUDIO_CACHE_ENABLED else None
+    audio_proc = AudioProcessor(cache=audio_cache)
+    audio_start, audio_duration, beats = analyze_music(audio_proc, custom_audio)
     
-    # Encontra o melhor trecho da música
-    print(f"\n🎵 Procurando melhor trecho da música...")
-    best_segment = audio_proc.find_best_segment(custom_audio, target_duration=60)
-    
-    if best_segment:
-        print(f"   ✓ Melhor trecho encontrado: {best_segment['start']:.1f}s - {best_segment['end']:.1f}s")
-        print(f"   ✓ Duração: {best_segment['duration']:.1f}s (energia: {best_segment['avg_energy']:.3f})")
-        audio_start = best_segment['start']
-        audio_duration = best_segment['duration']
-    else:
-        print(f"   ⚠️  Não foi possível encontrar melhor trecho, usando música completa")
-        audio_start = 0
-        audio_duration = full_audio_duration
-    
-    # Detecta beats no trecho selecionado (ajusta os beats para o trecho)
-    beats = audio_proc.detect_beats(custom_audio)
-    # Filtra beats que estão dentro do trecho selecionado e ajusta para começar em 0
-    beats = [beat - audio_start for beat in beats if audio_start <= beat < audio_start + audio_duration]
-    print(f"   Encontrados {len(beats)} pontos de corte no trecho selecionado")
-    
-    # Se tem muitos vídeos, seleciona aleatoriamente
-    if len(input_videos) > config.MAX_CLIPS_IN_COMPILATION:
-        print(f"\n⚡ Muitos vídeos! Selecionando {config.MAX_CLIPS_IN_COMPILATION} aleatoriamente...")
-        selected_videos = random.sample(input_videos, config.MAX_CLIPS_IN_COMPILATION)
-    else:
-        selected_videos = input_videos
+    selected_videos = select_videos(input_videos)
     
     # Extrai melhores momentos de cada vídeo selecionado
     print(f"\n🔍 Extraindo melhores momentos de {len(selected_videos)} vídeo(s)...")
-    best_clips = []
     
     # Calcula duração ideal por vídeo
     target_clip_duration = min(audio_duration / len(selected_videos), 12)
     
-    for i, video_path in enumerate(selected_videos, 1):
-        print(f"   [{i}/{len(selected_videos)}] {Path(video_path).name}")
-        
-        best_moment = analyzer.find_best_moments(video_path, target_clip_duration)
-        
-        if best_moment:
-            print(f"      ✓ Momento: {best_moment['start']:.1f}s - {best_moment['end']:.1f}s (score: {best_moment['score']:.1f})")
-            best_clips.append({
-                'path': video_path,
-                'start': best_moment['start'],
-                'end': best_moment['end'],
-                'score': best_moment['score']
-            })
+    with profiler.stage("extract_moments"):
+        moments = extract_best_moments(analyzer, selected_videos, target_clip_duration)
+    best_clips = clips_from_moments(selected_videos, moments)
     
     if not best_clips:
         print("\n❌ Não foi possível extrair momentos dos vídeos")
         return
     
+    # Planeja a edição e salva o plano (pode ser renderizado de novo com --timeline)
+    proxies = ProxyCache() if config.USE_PROXIES else None
+    editor = VideoEditor(pattern, beats, custom_audio, audio_start=audio_start, audio_duration=audio_duration,
+                         audio_cache=audio_cache, proxies=proxies)
+    with profiler.stage("plan"):
+        timeline = editor.plan_compilation(best_clips, audio_duration)
+    timeline.save(config.TIMELINE_FILE)
+    print(f"\n📄 Plano da edição salvo em: {config.TIMELINE_FILE}")
+    
+    if args.plan_only:
+        print(f"   Para renderizar: python main.py --timeline {config.TIMELINE_FILE}")
+        return
+    
     # Cria compilação
     print(f"\n🎬 Criando compilação com {len(best_clips)} clipes...")
-    editor = VideoEditor(pattern, beats, custom_audio, audio_start=audio_start, audio_duration=audio_duration)
-    output_path = os.path.join(config.OUTPUT_DIR, "reel_compilado.mp4")
-    
-    editor.create_compilation(best_clips, output_path, audio_duration)
+    editor.render_timeline(timeline, output_path, settings)
     
     print("\n" + "=" * 50)
     print(f"✅ Compilação concluída!")
     print(f"📁 Vídeo salvo em: {output_path}")
+    if args.preview:
+        print(f"   Versão final com o mesmo plano: python main.py --timeline {config.TIMELINE_FILE}")
 
 if __name__ == "__main__":
     main()
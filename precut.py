@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+import config
+from ffmpeg_utils import has_encoder, list_keyframes, probe_video, run_ffmpeg
+
+
+class ClipPrecutter:
+    """Recorta os trechos escolhidos em arquivos intermediários pequenos
+
+    Só o começo do trecho, até o primeiro keyframe, é recodificado; o resto
+    é copiado sem recodificar (stream copy) e as duas partes são unidas pelo
+    concat do ffmpeg. Assim a composição no MoviePy abre arquivos de poucos
+    segundos em vez dos vídeos originais inteiros. Fontes em que a cópia não
+    é segura (codec sem encoder equivalente, vídeo rotacionado) são
+    recodificadas por inteiro, o que continua limitado ao trecho.
+    """
+
+    # Encoder que gera o mesmo codec da fonte (necessário para juntar com a parte copiada)
+    ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+
+    def __init__(self, work_dir=None):
+        self.work_dir = Path(work_dir) if work_dir else None
+        self._owns_work_dir = work_dir is None
+        self._count = 0
+        self._lock = threading.Lock()  # cut pode ser chamado de várias threads (FramePipeline)
+        self.stats = {'stream_copy': 0, 'reencode': 0}
+
+    def cut(self, source, start, end):
+        """Extrai [start, end) de `source` e retorna o caminho do arquivo intermediário"""
+        info = probe_video(source)
+        output = self._next_path("clip")
+
+        if self._can_stream_copy(info):
+            try:
+                self._smart_cut(source, start, end, info, output)
+                self._check_duration(output, end - start, info['fps'])
+                self.stats['stream_copy'] += 1
+                return str(output)
+            except RuntimeError as e:
+                print(f"      ⚠️  Corte sem recodificar falhou, recodificando o trecho: {e}")
+
+        self._encode(source, start, end - start, output, 'libx264')
+        self.stats['reencode'] += 1
+        return str(output)
+
+    def cleanup(self):
+        """Remove os arquivos intermediários criados por este objeto"""
+        if self.work_dir is not None and self._owns_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+    def _can_stream_copy(self, info):
+        encoder = self.ENCODERS.get(info['video_codec'])
+        # A parte recodificada sai já rotacionada; a copiada, não. Não dá para juntar.
+        return encoder is not None and info['rotation'] == 0 and has_encoder(encoder)
+
+    def _smart_cut(self, source, start, end, info, output):
+        keyframes = list_keyframes(source, start, end - start)
+        if not keyframes:
+            # Nenhum keyframe no trecho: não há o que copiar
+            raise RuntimeError("sem keyframes no trecho")
+
+        keyframe = keyframes[0]
+        if keyframe - start < 0.5 / info['fps']:
+            # O trecho já começa num keyframe: cópia pura
+            self._copy(source, keyframe, end, output)
+            return
+
+        head = self._next_path("head")
+        tail = self._next_path("tail")
+        try:
+            # Só o pedaço até o primeiro keyframe passa pelo encoder
+            self._encode(source, start, keyframe - start, head, self.ENCODERS[info['video_codec']])
+            self._copy(source, keyframe, end, tail)
+            self._concat([head, tail], output)
+        finally:
+            head.unlink(missing_ok=True)
+            tail.unlink(missing_ok=True)
+
+    def _encode(self, source, start, duration, output, encoder):
+        run_ffmpeg([
+            "-v", "error", "-ss", f"{start:.6f}", "-i", source, "-t", f"{duration:.6f}",
+            "-an", "-sn", "-map", "0:v:0",
+            "-c:v", encoder, "-preset", "veryfast", "-crf", config.PRECUT_CRF,
+            output
+        ])
+
+    def _copy(self, source, keyframe, end, output):
+        # Um milissegundo depois do keyframe: o seek cai exatamente nele, nunca no anterior
+        run_ffmpeg([
+            "-v", "error", "-ss", f"{keyframe + 0.001:.6f}", "-i", source, "-t", f"{end - keyframe:.6f}",
+            "-an", "-sn", "-map", "0:v:0", "-c:v", "copy",
+            output
+        ])
+
+    def _concat(self, parts, output):
+        list_path = self._next_path("list", ".txt")
+        escaped = [str(Path(part).resolve()).replace("'", "'\\''") for part in parts]
+        list_path.write_text("".join(f"file '{part}'\n" for part in escaped))
+        try:
+            run_ffmpeg(["-v", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output])
+        finally:
+            list_path.unlink(missing_ok=True)
+
+    def _check_duration(self, output, expected, fps):
+        """Confere se o arquivo unido não ficou curto (proteção contra concat quebrado)
+
+        Só falta de frames é erro: a cópia de pacotes com -t passa alguns
+        frames do fim em fontes com B-frames, e o subclip corta o excesso.
+        """
+        duration = probe_video(str(output))['duration']
+        if duration < expected - max(0.1, 3.0 / fps):
+            raise RuntimeError(f"duração {duration:.2f}s, esperado {expected:.2f}s")
+
+    def _next_path(self, prefix, suffix=".mkv"):
+        # MKV: o concat com cópia funciona mesmo com parâmetros de encoder diferentes entre as partes
+        with self._lock:
+            if self.work_dir is None:
+                os.makedirs(config.CACHE_DIR, exist_ok=True)
+                self.work_dir = Path(tempfile.mkdtemp(prefix="precut_", dir=config.CACHE_DIR))
+            self._count += 1
+            return self.work_dir / f"{prefix}_{self._count:03d}{suffix}"
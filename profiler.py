@@ -0,0 +1,247 @@
+"""Medições por etapa de uma execução (tempo, contadores, memória)
+
+Uso nos módulos:
+
+    import profiler
+
+    with profiler.stage("find_best_moments"):
+        ...
+    profiler.count("frames_decoded", n)
+
+Desligado (padrão), `stage` e `count` não fazem nada. `main.py --metrics`
+liga as medições e salva um JSON por execução; `--trace` salva também no
+formato do Chrome (chrome://tracing, Perfetto) e `--cprofile` roda o
+cProfile dentro das etapas de config.CPROFILE_STAGES.
+"""
+import cProfile
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+import config
+
+# Intervalo de amostragem da memória (segundos)
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def _current_rss():
+    """Memória residente atual do processo em bytes (Linux); None se indisponível"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss(who):
+    """Pico de memória (ru_maxrss) em bytes: KB no Linux, bytes no macOS"""
+    value = resource.getrusage(who).ru_maxrss
+    return value if sys.platform == "darwin" else value * 1024
+
+
+class RunProfiler:
+    """Etapas aninhadas, contadores e pico de memória de uma execução
+
+    Cada etapa é registrada com início, fim, thread e caminho (ex.:
+    "render/crop_to_reels"). Threads sem etapa aberta (workers de pools)
+    penduram as etapas delas na etapa aberta da thread principal. Os
+    contadores são globais; cada etapa guarda quanto eles andaram enquanto
+    ela estava aberta. Uma thread amostra a memória residente e atualiza o
+    pico de todas as etapas abertas.
+    """
+
+    def __init__(self, cprofile_stages=()):
+        self.cprofile_stages = set(cprofile_stages)
+        self.started = time.perf_counter()
+        self.events = []
+        self.counters = {}
+        self._open = {}  # id -> etapa aberta (para o pico de memória)
+        self._profiles = {}  # etapa -> [cProfile.Profile]
+        self._profiling = False  # um cProfile por vez no processo inteiro
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._main_stack = []
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def stage(self, name):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._main_stack if threading.current_thread() is threading.main_thread() else []
+            self._local.stack = stack
+        parent = stack[-1]['path'] if stack else (self._main_stack[-1]['path'] if self._main_stack else None)
+
+        event = {
+            'name': name,
+            'path': f"{parent}/{name}" if parent else name,
+            'thread': threading.get_ident(),
+            'start': time.perf_counter() - self.started,
+            'peak_rss': _current_rss() or 0,
+        }
+        with self._lock:
+            event['counters'] = dict(self.counters)
+            self._open[id(event)] = event
+
+        profile = None
+        if name in self.cprofile_stages:
+            profile = self._start_cprofile()
+
+        stack.append(event)
+        try:
+            yield
+        finally:
+            stack.pop()
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self._profiling = False
+            end = time.perf_counter() - self.started
+            with self._lock:
+                self._open.pop(id(event), None)
+                before = event['counters']
+                event['counters'] = {key: value - before.get(key, 0) for key, value in self.counters.items()
+                                     if value != before.get(key, 0)}
+                event['duration'] = end - event['start']
+                self.events.append(event)
+                if profile is not None:
+                    self._profiles.setdefault(name, []).append(profile)
+
+    def _start_cprofile(self):
+        """Liga um cProfile se nenhum outro está ativo; senão a etapa roda sem ele
+
+        No Python 3.12+ o cProfile usa sys.monitoring e sys.getprofile()
+        continua None, então a exclusão é feita pela flag e não por ele.
+        """
+        with self._lock:
+            if self._profiling or sys.getprofile() is not None:
+                return None
+            self._profiling = True
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Outra ferramenta de profiling já está ativa (ex.: rodando sob um debugger)
+            with self._lock:
+                self._profiling = False
+            return None
+        return profile
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _sample_rss(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            rss = _current_rss()
+            if rss is None:
+                return
+            with self._lock:
+                for event in self._open.values():
+                    event['peak_rss'] = max(event['peak_rss'], rss)
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+
+    def summary(self):
+        """Etapas agregadas por caminho: chamadas, tempo total/máximo, pico de memória e contadores"""
+        stages = {}
+        with self._lock:
+            events = list(self.events)
+        for event in sorted(events, key=lambda e: e['start']):
+            entry = stages.setdefault(event['path'], {
+                'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'peak_rss_mb': 0.0, 'counters': {}
+            })
+            entry['calls'] += 1
+            entry['total_s'] += event['duration']
+            entry['max_s'] = max(entry['max_s'], event['duration'])
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'], event['peak_rss'] / (1024 * 1024))
+            for key, value in event['counters'].items():
+                entry['counters'][key] = entry['counters'].get(key, 0) + value
+
+        for entry in stages.values():
+            entry['total_s'] = round(entry['total_s'], 4)
+            entry['max_s'] = round(entry['max_s'], 4)
+            entry['peak_rss_mb'] = round(entry['peak_rss_mb'], 1)
+
+        return {
+            'wall_s': round(time.perf_counter() - self.started, 4),
+            'peak_rss_mb': round(_max_rss(resource.RUSAGE_SELF) / (1024 * 1024), 1),
+            'children_peak_rss_mb': round(_max_rss(resource.RUSAGE_CHILDREN) / (1024 * 1024), 1),
+            'counters': dict(self.counters),
+            'stages': stages,
+        }
+
+    def save_json(self, path):
+        _write_json(path, self.summary())
+
+    def save_chrome_trace(self, path):
+        """Eventos completos ("ph": "X") em microssegundos, um trilho por thread"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+        trace = [{
+            'name': event['name'], 'cat': event['path'].split('/')[0], 'ph': 'X',
+            'ts': round(event['start'] * 1e6, 1), 'dur': round(event['duration'] * 1e6, 1),
+            'pid': pid, 'tid': event['thread'],
+            'args': {'path': event['path'], 'peak_rss_mb': round(event['peak_rss'] / (1024 * 1024), 1),
+                     **event['counters']},
+        } for event in events]
+        _write_json(path, {'traceEvents': trace, 'displayTimeUnit': 'ms'})
+
+    def save_cprofile(self, directory):
+        """Um .prof por etapa (pstats / snakeviz), somando todas as chamadas dela"""
+        saved = []
+        for name, profiles in self._profiles.items():
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            path = Path(directory) / f"{name}.prof"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(path))
+            saved.append(str(path))
+        return saved
+
+
+def _write_json(path, data):
+    """Grava num arquivo temporário e só então substitui (nunca deixa JSON pela metade)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+_active = None
+
+
+def enable(cprofile=False):
+    """Liga as medições desta execução e retorna o RunProfiler"""
+    global _active
+    _active = RunProfiler(config.CPROFILE_STAGES if cprofile else ())
+    return _active
+
+
+def active():
+    return _active
+
+
+def stage(name):
+    """Mede o bloco como uma etapa (não faz nada se as medições estão desligadas)"""
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name)
+
+
+def count(name, n=1):
+    """Soma `n` ao contador `name` (ex.: frames_decoded, ffmpeg_processes)"""
+    if _active is not None:
+        _active.count(name, n)
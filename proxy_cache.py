@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+import config
+import lru_dir
+from ffmpeg_utils import run_ffmpeg
+
+# Quanto de cada ponta (e do meio) do arquivo entra no hash do conteúdo
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+class ProxyCache:
+    """Cópias pequenas (proxies) dos vídeos de origem, geradas uma vez só
+
+    Cada vídeo é convertido para H.264 com o lado menor em `short_side` px e
+    GOP curto (keyframe a cada poucos frames), o que torna seeks e leituras
+    de trechos baratos. A chave é um hash do conteúdo (tamanho + início, meio
+    e fim do arquivo) e dos parâmetros do proxy, então renomear ou mover um
+    vídeo não gera um proxy novo. Os tempos são os mesmos do original, então
+    análise e prévia usam o proxy no lugar dele sem converter nada; a
+    renderização final continua lendo os originais. O disco é limitado a
+    `max_bytes` com remoção LRU.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, short_side=None, crf=None, gop=None, preset=None):
+        self.cache_dir = Path(cache_dir or os.path.join(config.CACHE_DIR, "proxies"))
+        self.max_bytes = max_bytes if max_bytes is not None else config.PROXY_CACHE_MAX_MB * 1024 * 1024
+        self.short_side = short_side or config.PROXY_SHORT_SIDE
+        self.crf = crf if crf is not None else config.PROXY_CRF
+        self.gop = gop or config.PROXY_GOP
+        self.preset = preset or config.PROXY_PRESET
+        self._lock = threading.Lock()
+        self._key_locks = {}  # uma trava por proxy: threads pedindo o mesmo vídeo esperam a mesma conversão
+        self._keys = {}  # (caminho, mtime, tamanho) -> chave, para não reler o arquivo
+
+    def key(self, path):
+        """Chave do proxy: hash do conteúdo amostrado + parâmetros da conversão"""
+        stat = os.stat(path)
+        memo = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if memo in self._keys:
+            return self._keys[memo]
+
+        digest = hashlib.sha1(f"{stat.st_size}|{self.short_side}|{self.crf}|{self.gop}".encode())
+        with open(path, 'rb') as f:
+            for offset in (0, max(0, stat.st_size // 2 - HASH_CHUNK_BYTES // 2), max(0, stat.st_size - HASH_CHUNK_BYTES)):
+                f.seek(offset)
+                digest.update(f.read(HASH_CHUNK_BYTES))
+
+        key = digest.hexdigest()
+        self._keys[memo] = key
+        return key
+
+    def get(self, path):
+        """Caminho do proxy de `path`, convertendo na primeira vez
+
+        Se a conversão falhar, retorna o próprio `path` (o original sempre serve).
+        """
+        try:
+            key = self.key(path)
+        except OSError:
+            return path
+
+        proxy_path = self.cache_dir / f"{key}.mp4"
+        with self._key_lock(key):
+            if proxy_path.exists():
+                lru_dir.touch(proxy_path)
+                return str(proxy_path)
+
+            try:
+                self._transcode(path, proxy_path)
+            except RuntimeError as e:
+                print(f"      ⚠️  Não foi possível gerar proxy de {Path(path).name}, usando o original: {e}")
+                return path
+
+        lru_dir.evict(self.cache_dir, self.max_bytes, keep={key}, pattern="*.mp4")
+        return str(proxy_path)
+
+    def _transcode(self, path, proxy_path):
+        """Converte para o proxy num arquivo temporário e só então publica"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = proxy_path.with_name(f"{proxy_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.mp4")
+        side = self.short_side
+
+        # Lado menor = short_side (sem ampliar vídeos menores), já com a rotação aplicada
+        scale = (
+            f"scale='if(gt(iw,ih),-2,min({side},iw))':'if(gt(iw,ih),min({side},ih),-2)'"
+        )
+        try:
+            run_ffmpeg([
+                "-v", "error", "-i", path,
+                "-map", "0:v:0", "-an", "-sn",
+                "-vf", f"{scale},format=yuv420p",
+                "-c:v", "libx264", "-preset", self.preset, "-crf", self.crf,
+                "-g", self.gop, "-bf", 0,
+                str(tmp_path)
+            ])
+            os.replace(tmp_path, proxy_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import Optional
+import config
+
+
+@dataclass(frozen=True, slots=True)
+class RenderSettings:
+    """Parâmetros de saída de uma renderização
+
+    A mesma Timeline pode ser renderizada com configurações diferentes: a
+    versão final em 1080x1920 ou uma prévia pequena e rápida para conferir
+    os cortes antes.
+    """
+    width: int
+    height: int
+    fps: int = 30
+    codec: str = 'libx264'
+    preset: str = 'medium'
+    bitrate: Optional[str] = '8000k'
+    crf: Optional[int] = None  # qualidade constante no lugar do bitrate
+    gop: Optional[int] = None  # intervalo máximo entre keyframes (None = padrão do encoder)
+    tune: Optional[str] = None
+    threads: int = 0  # 0 = o encoder decide
+    slices: Optional[int] = None
+    audio_codec: str = 'aac'
+    backend: str = 'moviepy'
+    use_proxies: bool = False  # lê os proxies dos vídeos em vez dos originais
+
+    @property
+    def scale(self):
+        """Proporção em relação ao tamanho final (ajusta margens e tamanhos fixos)"""
+        return self.width / config.REELS_WIDTH
+
+    def video_params(self):
+        """Argumentos extras do encoder de vídeo (qualidade, GOP, tune, threads)"""
+        params = []
+        if self.crf is not None:
+            params += ["-crf", str(self.crf)]
+        if self.gop:
+            params += ["-g", str(self.gop)]
+        if self.tune:
+            params += ["-tune", self.tune]
+        if self.threads:
+            params += ["-threads", str(self.threads)]
+        if self.slices:
+            params += ["-slices", str(self.slices)]
+        return params
+
+    def encoder_args(self):
+        """Todos os argumentos do encoder de vídeo para uma chamada do ffmpeg"""
+        args = ["-c:v", self.codec, "-preset", self.preset]
+        if self.bitrate:
+            args += ["-b:v", self.bitrate]
+        return args + self.video_params()
+
+    @staticmethod
+    def profile(name):
+        """Parâmetros do perfil de encode `name` (config.ENCODE_PROFILES)"""
+        try:
+            return dict(config.ENCODE_PROFILES[name])
+        except KeyError:
+            raise ValueError(f"perfil de encode desconhecido: {name} (opções: {', '.join(config.ENCODE_PROFILES)})")
+
+    @classmethod
+    def final(cls, profile=None):
+        return cls(
+            width=config.REELS_WIDTH,
+            height=config.REELS_HEIGHT,
+            backend=config.RENDER_BACKEND,
+            **cls.profile(profile or config.ENCODE_PROFILE)
+        )
+
+    @classmethod
+    def preview(cls, profile=None):
+        return cls(
+            width=config.PREVIEW_WIDTH,
+            height=config.PREVIEW_HEIGHT,
+            fps=config.PREVIEW_FPS,
+            gop=config.PREVIEW_GOP,
+            backend=config.PREVIEW_BACKEND,
+            use_proxies=config.USE_PROXIES,
+            **cls.profile(profile or config.PREVIEW_PROFILE)
+        )
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import config
+import lru_dir
+
+# Muda quando o formato dos trechos codificados muda (invalida o cache antigo)
+SEGMENT_CACHE_VERSION = 1
+
+
+class SegmentCache:
+    """Trechos da compilação já codificados, reaproveitados entre renderizações
+
+    Cada trecho (vaga da timeline) é identificado pelo vídeo de origem
+    (caminho + mtime + tamanho), corte, velocidade, recorte, tamanho final,
+    número de frames, parâmetros do encoder e a parte da logo que cai nele.
+    Trocar um clipe ou a logo só gera de novo as vagas afetadas; as outras
+    são juntadas por cópia de stream. O disco é limitado a `max_bytes` com
+    remoção LRU. `stats` conta acertos e faltas desde a criação.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = Path(cache_dir or os.path.join(config.CACHE_DIR, "segments"))
+        self.max_bytes = max_bytes if max_bytes is not None else config.SEGMENT_CACHE_MAX_MB * 1024 * 1024
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def file_id(path):
+        """Identidade de um arquivo: muda quando ele é editado ou substituído"""
+        stat = os.stat(path)
+        return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+    def key(self, description):
+        """Chave de um trecho a partir da descrição dele (qualquer valor serializável em JSON)"""
+        raw = json.dumps([SEGMENT_CACHE_VERSION, description], sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def get(self, key):
+        """Caminho do trecho codificado, ou None se ainda não existe"""
+        segment_path = self.cache_dir / f"{key}.mp4"
+        if segment_path.exists():
+            lru_dir.touch(segment_path)
+            self.stats['hits'] += 1
+            return str(segment_path)
+        self.stats['misses'] += 1
+        return None
+
+    def tmp_path(self, key):
+        """Onde codificar um trecho novo antes de publicá-lo com `put`"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return str(self.cache_dir / f"{key}.{os.getpid()}.tmp.mp4")
+
+    def put(self, key, tmp_path):
+        """Publica o trecho codificado em `tmp_path` e retorna o caminho final"""
+        segment_path = self.cache_dir / f"{key}.mp4"
+        os.replace(tmp_path, segment_path)
+        return str(segment_path)
+
+    def evict(self, keep=()):
+        """Remove os trechos usados há mais tempo até caber em `max_bytes`
+
+        As chaves em `keep` (os trechos da renderização atual) nunca saem.
+        """
+        lru_dir.evict(self.cache_dir, self.max_bytes, keep=set(keep), pattern="*.mp4")
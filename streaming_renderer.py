@@ -0,0 +1,184 @@
+import queue
+import subprocess
+import tempfile
+import threading
+import config
+import profiler
+from ffmpeg_renderer import FFmpegRenderer
+from ffmpeg_utils import get_ffmpeg_exe, probe_video
+from frame_pipeline import drain, put_until_stopped
+
+# Marca o fim dos frames na fila
+_DONE = object()
+
+
+class StreamingRenderer(FFmpegRenderer):
+    """Renderiza a compilação abrindo um vídeo de origem por vez
+
+    Cada trecho é decodificado por um ffmpeg próprio, já cortado, acelerado,
+    recortado em 9:16 e na taxa final, e os frames crus seguem por uma fila
+    limitada até o ffmpeg do encoder (que aplica logo e música como o
+    FFmpegRenderer). O decodificador de um trecho só é aberto quando o
+    anterior termina e é fechado logo em seguida, então o pico de memória
+    é a fila (`queue_frames` frames do tamanho final) mais um decodificador,
+    independente do número e da resolução dos clipes.
+    """
+
+    def __init__(self, settings=None, queue_frames=None):
+        super().__init__(settings)
+        self.queue_frames = queue_frames or config.STREAM_QUEUE_FRAMES
+
+    @property
+    def frame_bytes(self):
+        return self.width * self.height * 3
+
+    def render(self, timeline, output_path):
+        """Gera o vídeo final da timeline e retorna a duração dele"""
+        if not timeline.segments:
+            raise ValueError("nenhum trecho para renderizar")
+
+        plan = self.frame_plan(timeline)
+        total_frames = sum(frames for _, frames in plan)
+        duration = total_frames / self.fps
+
+        frames = queue.Queue(maxsize=self.queue_frames)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(plan, frames, stop), daemon=True)
+
+        with tempfile.TemporaryFile() as encoder_log:
+            profiler.count("ffmpeg_processes")
+            encoder = subprocess.Popen(
+                [get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-y"] +
+                [str(arg) for arg in self.encoder_command(timeline, duration, output_path)],
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=encoder_log
+            )
+            producer.start()
+            try:
+                with profiler.stage("encode"):
+                    self._consume(frames, encoder)
+            except BrokenPipeError:
+                pass  # o encoder morreu; o erro dele é reportado abaixo
+            finally:
+                stop.set()
+                drain(frames)
+                producer.join()
+                if encoder.stdin and not encoder.stdin.closed:
+                    try:
+                        encoder.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                returncode = encoder.wait()
+
+            if returncode != 0:
+                encoder_log.seek(0)
+                stderr = encoder_log.read().decode(errors='ignore')
+                raise RuntimeError(f"ffmpeg falhou ({returncode}): {stderr.strip()[-500:]}")
+
+        return duration
+
+    def frame_plan(self, timeline):
+        """Cada trecho com o número exato de frames que ocupa no vídeo final
+
+        Contar frames (e não segundos) evita que arredondamentos se acumulem
+        de um clipe para o outro. O total é cortado em `max_duration`.
+        """
+        plan = []
+        remaining = None
+        if timeline.max_duration is not None:
+            remaining = int(round(timeline.max_duration * self.fps))
+
+        total = 0.0
+        planned = 0
+        for segment in timeline.segments:
+            info = probe_video(segment.path)
+            end = min(segment.end, info['duration'])
+            total += (end - segment.start) / segment.speed
+            count = int(round(total * self.fps)) - planned
+            if remaining is not None:
+                count = min(count, remaining - planned)
+            if count <= 0:
+                break
+            plan.append(((segment, info, end), count))
+            planned += count
+
+        if timeline.max_duration is not None and total > timeline.max_duration:
+            print(f"   ✂️  Ajustando duração do vídeo final: {total:.1f}s -> {timeline.max_duration:.1f}s")
+        return plan
+
+    def decoder_command(self, segment, info, end):
+        """ffmpeg que escreve os frames do trecho, já no formato final, em RGB cru"""
+        return [
+            get_ffmpeg_exe(), "-v", "error", "-nostdin",
+            "-ss", f"{segment.start:.6f}", "-t", f"{end - segment.start:.6f}", "-i", segment.path,
+            "-an", "-sn",
+            "-vf", (
+                f"setpts=(PTS-STARTPTS)/{segment.speed},{self._reels_filter(info['size'])},"
+                f"fps={self.fps},setsar=1,format=rgb24"
+            ),
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-"
+        ]
+
+    def encoder_command(self, timeline, duration, output_path):
+        """ffmpeg que lê os frames crus do stdin e aplica logo, música e encoder"""
+        inputs = [
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{self.width}x{self.height}",
+            "-framerate", self.fps, "-i", "-"
+        ]
+        filters = ["[0:v]setsar=1,format=yuv420p[base]"]
+        return self._output_args(inputs, filters, "[base]", 1, timeline, duration, output_path)
+
+    def _produce(self, plan, frames, stop):
+        """Decodifica os trechos em sequência e põe os frames na fila"""
+        try:
+            for (segment, info, end), count in plan:
+                last = None
+                sent = 0
+                for data in self._decode(segment, info, end, count, stop):
+                    if not put_until_stopped(frames, data, stop):
+                        return
+                    last = data
+                    sent += 1
+
+                if stop.is_set():
+                    return
+                if last is None:
+                    raise RuntimeError(f"nenhum frame decodificado de {segment.path}")
+
+                # Trecho mais curto que o esperado (fim do arquivo): repete o último frame
+                for _ in range(count - sent):
+                    if not put_until_stopped(frames, last, stop):
+                        return
+            put_until_stopped(frames, _DONE, stop)
+        except Exception as e:
+            put_until_stopped(frames, e, stop)
+
+    def _decode(self, segment, info, end, count, stop):
+        """Até `count` frames do trecho; o decodificador é fechado ao terminar"""
+        profiler.count("ffmpeg_processes")
+        proc = subprocess.Popen(self.decoder_command(segment, info, end),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(count):
+                if stop.is_set():
+                    return
+                data = proc.stdout.read(self.frame_bytes)
+                if len(data) < self.frame_bytes:
+                    return
+                profiler.count("frames_decoded")
+                yield data
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
+
+    def _consume(self, frames, encoder):
+        """Escreve os frames da fila no stdin do encoder até o fim"""
+        while True:
+            item = frames.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            encoder.stdin.write(item)
+            profiler.count("frames_encoded")
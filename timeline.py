@@ -0,0 +1,88 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+# Muda quando o formato do JSON muda de forma incompatível
+TIMELINE_VERSION = 1
+
+
+@dataclass(slots=True)
+class Segment:
+    """Trecho de um vídeo na compilação (tempos no arquivo de origem)"""
+    path: str
+    start: float
+    end: float
+    speed: float = 1.0
+    score: Optional[float] = None
+
+    @property
+    def duration(self):
+        """Duração do trecho no vídeo final (já com a velocidade aplicada)"""
+        return (self.end - self.start) / self.speed
+
+
+@dataclass(slots=True)
+class AudioTrack:
+    """Trecho da música usado como trilha"""
+    path: str
+    start: float = 0.0
+    duration: Optional[float] = None
+
+
+@dataclass(slots=True)
+class Timeline:
+    """Lista de decisões de edição (EDL) da compilação
+
+    É o resultado da etapa de planejamento (análise dos vídeos e da música)
+    e tudo o que a renderização precisa: pode ser salva em JSON e renderizada
+    depois, em outro processo ou máquina, quantas vezes for preciso (prévia,
+    versão final, nova tentativa) sem repetir a análise. Não guarda resolução
+    nem encoder, que são escolhas de cada renderização.
+    """
+    segments: List[Segment] = field(default_factory=list)
+    audio: Optional[AudioTrack] = None
+    max_duration: Optional[float] = None  # o vídeo é cortado aqui (duração do trecho da música)
+    beats: List[float] = field(default_factory=list)  # tempos dos beats, relativos ao início da música
+    logo_path: Optional[str] = None
+
+    @property
+    def duration(self):
+        """Duração do vídeo final"""
+        total = sum(segment.duration for segment in self.segments)
+        if self.max_duration is not None:
+            return min(total, self.max_duration)
+        return total
+
+    def to_dict(self):
+        data = asdict(self)
+        data['version'] = TIMELINE_VERSION
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        version = data.get('version')
+        if version != TIMELINE_VERSION:
+            raise ValueError(f"timeline na versão {version}, esperado {TIMELINE_VERSION}")
+
+        audio = data.get('audio')
+        return cls(
+            segments=[Segment(**segment) for segment in data.get('segments', [])],
+            audio=AudioTrack(**audio) if audio else None,
+            max_duration=data.get('max_duration'),
+            beats=[float(t) for t in data.get('beats', [])],
+            logo_path=data.get('logo_path')
+        )
+
+    def save(self, path):
+        """Salva em JSON (escrita atômica: nunca deixa um arquivo pela metade)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -1,18 +1,25 @@
 import os
 from pathlib import Path
-from openai import OpenAI
-try:
-    from moviepy.editor import VideoFileClip
-except ImportError:
-    from moviepy import VideoFileClip
 import base64
 import config
 import numpy as np
+import profiler
+from ffmpeg_utils import iter_frames, probe_video
+from frame_metrics import score_segments
+
+# Versão do algoritmo de pontuação; mude ao alterar a análise para invalidar o índice
+ANALYSIS_VERSION = 8
 
 class VideoAnalyzer:
-    def __init__(self):
+    def __init__(self, index=None, proxies=None):
+        # Índice persistente (AnalysisIndex) para pular vídeos já analisados
+        self.index = index
+        # ProxyCache opcional: a análise dos momentos decodifica o proxy em vez do original
+        self.proxies = proxies
+        
         # Só inicializa cliente IA se a flag estiver ativada E tiver API key
         if config.USE_AI_ANALYSIS and config.OPENROUTER_API_KEY:
+            from openai import OpenAI  # import pesado: só quando a IA vai ser usada
             self.client = OpenAI(
                 api_key=config.OPENROUTER_API_KEY,
                 base_url=config.OPENROUTER_BASE_URL
@@ -20,24 +27,89 @@ class VideoAnalyzer:
         else:
             self.client = None
     
-    def extract_frames(self, video_path, num_frames=5):
-        """Extrai frames do vídeo para análise"""
-        clip = VideoFileClip(video_path)
-        duration = clip.duration
-        frames = []
+    def extract_frames(self, video_path, num_frames=5, width=None):
+        """Extrai frames do vídeo para análise (width reduz a resolução)"""
+        info = probe_video(video_path)
         
-        for i in range(num_frames):
-            time = (duration / num_frames) * i
-            frame = clip.get_frame(time)
+        # Uma passada só pelos keyframes, amostrando num_frames ao longo do vídeo
+        frames = []
+        for _, frame in iter_frames(video_path, fps=num_frames / info['duration'], width=width,
+                                    keyframes_only=True, info=info):
             frames.append(frame)
+            if len(frames) == num_frames:
+                break
         
-        clip.close()
         return frames
     
+    def _score_segments(self, frames, segment_ids, num_segments):
+        """Kernel único de pontuação (brilho, contraste, movimento, cortes) com os parâmetros do config"""
+        return score_segments(
+            np.stack(frames),
+            segment_ids,
+            num_segments,
+            motion_weight=config.MOTION_WEIGHT,
+            noise_floor=config.MOTION_NOISE_FLOOR,
+            cut_threshold=config.SCENE_CUT_THRESHOLD,
+            cut_penalty=config.SCENE_CUT_PENALTY
+        )
+    
+    def _score_sparse(self, frames, segment_ids, num_segments):
+        """Pontuação de amostras distantes no tempo (keyframes): só brilho e contraste
+        
+        Cada amostra é pontuada sozinha, sem movimento nem cortes de cena
+        entre ela e a vizinha (segundos de distância não são movimento), e o
+        segmento fica com a média das amostras dele. Mesmo formato de
+        retorno de `score_segments`.
+        """
+        segment_ids = np.asarray(segment_ids)
+        frame_scores = self._score_segments(frames, np.arange(len(frames)), len(frames))['score']
+        inside = segment_ids >= 0
+        samples = np.bincount(segment_ids[inside], minlength=num_segments)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score = np.bincount(segment_ids[inside], weights=frame_scores[inside], minlength=num_segments) / samples
+        return {
+            'score': score,
+            'motion': np.zeros(num_segments),
+            'scene_cuts': np.zeros(num_segments, dtype=int),
+            'samples': samples
+        }
+    
     def find_best_moments(self, video_path, target_duration=10):
         """Identifica os melhores momentos do vídeo (análise local, sem IA)"""
-        clip = VideoFileClip(video_path)
-        duration = clip.duration
+        params = {
+            'version': ANALYSIS_VERSION,
+            'sample_frames': config.SAMPLE_FRAMES,
+            'min_moment_duration': config.MIN_MOMENT_DURATION,
+            'analysis_fps': config.ANALYSIS_FPS,
+            'analysis_width': config.ANALYSIS_WIDTH,
+            'keyframes_only': config.ANALYSIS_KEYFRAMES_ONLY,
+            'coarse_to_fine': config.COARSE_TO_FINE,
+            'coarse_fps': config.COARSE_FPS,
+            'refine_top_k': config.REFINE_TOP_K,
+            'refine_margin': config.REFINE_MARGIN,
+            'proxy_short_side': self.proxies.short_side if self.proxies is not None else None,
+            'target_duration': target_duration
+        }
+        if self.index is not None:
+            cached = self.index.get('moments', video_path, params)
+            if cached is not None:
+                return cached['best']
+        
+        with profiler.stage("find_best_moments"):
+            source = self.proxies.get(video_path) if self.proxies is not None else video_path
+            moments = self._score_moments(source, target_duration)
+        best_moment = moments[0] if moments else None
+        
+        if self.index is not None:
+            # Guarda a pontuação de todos os segmentos, não só do vencedor
+            self.index.put('moments', video_path, params, {'best': best_moment, 'segments': moments})
+        
+        return best_moment
+    
+    def _score_moments(self, video_path, target_duration):
+        """Pontua os segmentos do vídeo; retorna a lista ordenada do melhor ao pior"""
+        info = probe_video(video_path)
+        duration = info['duration']
         
         # Se vídeo é curto, usa quase tudo
         if duration <= target_duration + 4:
@@ -47,79 +119,160 @@ class VideoAnalyzer:
                 'score': 100,
                 'duration': min(duration - 2, target_duration)
             }
-            clip.close()
-            return best_moment
-        
-        # Análise rápida: amostra poucos frames
-        best_moments = []
+            return [best_moment]
         
         # Divide vídeo em segmentos
         num_segments = max(2, int(duration / 10))  # Segmentos de ~10s
         segment_duration = duration / num_segments
+        segments = []
         
         for i in range(num_segments):
             start = i * segment_duration + 1  # Pula 1s do início
             end = min(start + target_duration, (i + 1) * segment_duration - 1)
             
             if end - start >= config.MIN_MOMENT_DURATION:
-                # Analisa apenas 3 frames por segmento (rápido!)
-                scores = []
-                for sample in range(config.SAMPLE_FRAMES):
-                    sample_time = start + (end - start) * (sample / config.SAMPLE_FRAMES)
-                    frame = clip.get_frame(sample_time)
-                    
-                    # Métricas de qualidade
-                    brightness = np.mean(frame)
-                    contrast = np.std(frame)
-                    
-                    # Detecta movimento (diferença entre canais)
-                    motion = np.std([np.std(frame[:,:,c]) for c in range(3)])
-                    
-                    # Score: prefere vídeos bem iluminados, com contraste e movimento
-                    score = (brightness * 0.3 + contrast * 0.5 + motion * 0.2)
-                    scores.append(score)
-                
-                avg_score = np.mean(scores)
-                
-                best_moments.append({
-                    'start': start,
-                    'end': end,
-                    'score': avg_score,
-                    'duration': end - start
-                })
+                segments.append((start, end))
         
-        clip.close()
+        if not segments:
+            return []
         
-        # Ordena por score
-        best_moments.sort(key=lambda x: x['score'], reverse=True)
+        # Taxa que garante pelo menos SAMPLE_FRAMES amostras no segmento mais curto
+        dense_fps = max(config.ANALYSIS_FPS, config.SAMPLE_FRAMES / min(end - start for start, end in segments))
         
-        return best_moments[0] if best_moments else None
+        if not config.COARSE_TO_FINE or len(segments) <= config.REFINE_TOP_K:
+            result = self._sample_segments(video_path, info, segments, dense_fps, config.ANALYSIS_KEYFRAMES_ONLY)
+            best_moments = self._moment_list(segments, result)
+            best_moments.sort(key=lambda x: x['score'], reverse=True)
+            return best_moments
+        
+        # 1ª passada: só keyframes, barata, para descartar os segmentos que não têm chance
+        # (keyframes ficam a segundos de distância: pontuados sem movimento nem cortes)
+        coarse = self._sample_segments(video_path, info, segments, config.COARSE_FPS, True,
+                                       drop_duplicates=True, sparse=True)
+        candidates = self._moment_list(segments, coarse, refined=False)
+        
+        # GOP longo: segmento sem keyframe ganha uma amostra decodificando o trecho, senão nunca venceria
+        sampled = {(moment['start'], moment['end']) for moment in candidates}
+        for segment in segments:
+            if segment not in sampled:
+                result = self._sample_segments(video_path, info, [segment], config.COARSE_FPS, False, sparse=True)
+                candidates.extend(self._moment_list([segment], result, refined=False))
+        candidates.sort(key=lambda x: x['score'], reverse=True)
+        
+        # 2ª passada: amostragem densa nos REFINE_TOP_K melhores e em quem ficou
+        # a até REFINE_MARGIN do K-ésimo (a 1ª passada não separa bem notas próximas)
+        refine_count = min(config.REFINE_TOP_K, len(candidates))
+        if refine_count:
+            threshold = candidates[refine_count - 1]['score'] * (1 - config.REFINE_MARGIN)
+            while refine_count < len(candidates) and candidates[refine_count]['score'] >= threshold:
+                refine_count += 1
+        
+        refined = []
+        unrefined = []
+        for moment in candidates[:refine_count]:
+            segment = [(moment['start'], moment['end'])]
+            result = self._sample_segments(video_path, info, segment, dense_fps, config.ANALYSIS_KEYFRAMES_ONLY)
+            dense = self._moment_list(segment, result, refined=True)
+            if dense:
+                refined.extend(dense)
+            else:
+                # A passada densa não leu nada: o candidato continua com a pontuação da 1ª passada
+                unrefined.append(moment)
+        refined.sort(key=lambda x: x['score'], reverse=True)
+        
+        # Os refinados vêm primeiro: os scores das duas passadas não são comparáveis
+        return refined + unrefined + candidates[refine_count:]
+    
+    def _sample_segments(self, video_path, info, segments, fps, keyframes_only, drop_duplicates=False, sparse=False):
+        """Amostra os segmentos numa passada sequencial e pontua todos de uma vez
+        
+        Com `sparse` as amostras são pontuadas por `_score_sparse` (sem
+        movimento nem cortes). Retorna o resultado de `score_segments` ou
+        None se nenhum frame foi lido.
+        """
+        starts = np.array([start for start, _ in segments])
+        ends = np.array([end for _, end in segments])
+        
+        frames = iter_frames(
+            video_path,
+            fps=fps,
+            width=config.ANALYSIS_WIDTH,
+            start=starts[0],
+            duration=ends[-1] - starts[0],
+            keyframes_only=keyframes_only,
+            drop_duplicates=drop_duplicates,
+            info=info
+        )
+        
+        times = []
+        sampled = []
+        for t, frame in frames:
+            times.append(t)
+            sampled.append(frame)
+        
+        if not sampled:
+            return None
+        
+        # Segmento de cada amostra (-1 = entre segmentos)
+        times = np.array(times)
+        segment_ids = np.searchsorted(starts, times, side='right') - 1
+        outside = (segment_ids < 0) | (times >= ends[np.maximum(segment_ids, 0)])
+        segment_ids[outside] = -1
+        
+        # Score: prefere vídeos bem iluminados, com contraste e movimento;
+        # cortes de cena dentro do trecho atrapalham o clipe
+        if sparse:
+            return self._score_sparse(sampled, segment_ids, len(segments))
+        return self._score_segments(sampled, segment_ids, len(segments))
+    
+    def _moment_list(self, segments, result, **extra):
+        """Converte o resultado do kernel em dicts, ignorando segmentos sem amostras"""
+        if result is None:
+            return []
+        
+        moments = []
+        for i, (start, end) in enumerate(segments):
+            if result['samples'][i] == 0:
+                continue
+            
+            moments.append({
+                'start': start,
+                'end': end,
+                'score': float(result['score'][i]),
+                'duration': end - start,
+                'motion': float(result['motion'][i]),
+                'scene_cuts': int(result['scene_cuts'][i]),
+                **extra
+            })
+        
+        return moments
     
     def rank_videos(self, video_paths, max_videos=None):
         """Ranqueia vídeos por qualidade (análise local, sem IA)"""
         print(f"\n📊 Analisando qualidade de {len(video_paths)} vídeos...")
         
         ranked = []
+        params = {
+            'version': ANALYSIS_VERSION,
+            'sample_frames': config.SAMPLE_FRAMES,
+            'analysis_width': config.ANALYSIS_WIDTH
+        }
         
         for i, video_path in enumerate(video_paths, 1):
             try:
-                clip = VideoFileClip(video_path)
-                duration = clip.duration
+                cached = self.index.get('rank', video_path, params) if self.index is not None else None
+                if cached is not None:
+                    ranked.append({'path': video_path, 'score': cached['score'], 'duration': cached['duration']})
+                    print(f"   [{i}/{len(video_paths)}] {Path(video_path).name}: score {cached['score']:.1f} (índice)")
+                    continue
                 
-                # Amostra apenas 3 frames do vídeo inteiro
-                scores = []
-                for sample in range(config.SAMPLE_FRAMES):
-                    time = duration * (sample / config.SAMPLE_FRAMES)
-                    frame = clip.get_frame(time)
-                    
-                    brightness = np.mean(frame)
-                    contrast = np.std(frame)
-                    motion = np.std([np.std(frame[:,:,c]) for c in range(3)])
-                    
-                    score = brightness * 0.3 + contrast * 0.5 + motion * 0.2
-                    scores.append(score)
+                info = probe_video(video_path)
+                duration = info['duration']
                 
-                avg_score = np.mean(scores)
+                # Amostra apenas 3 frames do vídeo inteiro (só keyframes, reduzidos)
+                frames = self.extract_frames(video_path, config.SAMPLE_FRAMES, width=config.ANALYSIS_WIDTH)
+                # Amostras espalhadas pelo vídeo: sem movimento nem cortes entre elas
+                avg_score = float(self._score_sparse(frames, np.zeros(len(frames), dtype=int), 1)['score'][0])
                 
                 ranked.append({
                     'path': video_path,
@@ -127,7 +280,8 @@ class VideoAnalyzer:
                     'duration': duration
                 })
                 
-                clip.close()
+                if self.index is not None:
+                    self.index.put('rank', video_path, params, {'score': avg_score, 'duration': duration})
                 
                 print(f"   [{i}/{len(video_paths)}] {Path(video_path).name}: score {avg_score:.1f}")
                 
@@ -146,17 +300,15 @@ class VideoAnalyzer:
     
     def analyze_pattern(self, padrao_video_path):
         """Analisa o vídeo padrão e retorna características"""
-        clip = VideoFileClip(padrao_video_path)
+        info = probe_video(padrao_video_path)
         
         analysis = {
-            "duration": clip.duration,
-            "fps": clip.fps,
-            "size": clip.size,
-            "has_audio": clip.audio is not None
+            "duration": info['duration'],
+            "fps": info['fps'],
+            "size": info['size'],
+            "has_audio": info['has_audio']
         }
         
-        clip.close()
-        
         # Usar IA para análise mais profunda
         if self.client:
             prompt = f"""Analise este vídeo de culto e descreva:
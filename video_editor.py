@@ -1,25 +1,53 @@
-try:
-    from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips, CompositeVideoClip, ImageClip
-except ImportError:
-    from moviepy import VideoFileClip, AudioFileClip, concatenate_videoclips, CompositeVideoClip, ImageClip
+from PIL import Image
 
+from dataclasses import replace
 from pathlib import Path
+import shutil
+import tempfile
 import config
+import profiler
+from precut import ClipPrecutter
+from ffmpeg_renderer import FFmpegRenderer
+from streaming_renderer import StreamingRenderer
+from chunked_renderer import ChunkedRenderer
+from segment_cache import SegmentCache
+from ffmpeg_utils import load_moviepy
+from frame_pipeline import FramePipeline
+from logo_overlay import LogoOverlay
+from render_settings import RenderSettings
+from cut_planner import plan_cuts
+from timeline import AudioTrack, Segment, Timeline
 import numpy as np
 import os
 
 class VideoEditor:
-    def __init__(self, pattern_analysis, beat_times, custom_audio=None, audio_start=0, audio_duration=None):
+    def __init__(self, pattern_analysis, beat_times, custom_audio=None, audio_start=0, audio_duration=None, audio_cache=None,
+                 proxies=None, evict_segments=True):
         self.pattern = pattern_analysis
         self.beats = beat_times
         self.custom_audio = custom_audio
         self.audio_start = audio_start  # Início do trecho de áudio a usar
         self.audio_duration = audio_duration  # Duração do trecho de áudio
+        self.audio_cache = audio_cache  # AudioCache compartilhado com o AudioProcessor (opcional)
+        self.proxies = proxies  # ProxyCache usado nas renderizações com settings.use_proxies (opcional)
+        # False quando outros processos renderizam ao mesmo tempo: o SegmentCache é limitado uma vez no fim
+        self.evict_segments = evict_segments
     
-    def crop_to_reels(self, clip):
+    def load_music(self, path=None):
+        """Abre a música customizada, reaproveitando o PCM do cache se houver"""
+        path = path or self.custom_audio
+        moviepy = load_moviepy()
+        if self.audio_cache is None:
+            return moviepy.AudioFileClip(path)
+        
+        # O PCM em cache é um memmap: o clipe lê só as amostras usadas
+        return moviepy.AudioArrayClip(self.audio_cache.pcm(path), fps=self.audio_cache.sample_rate)
+    
+    def crop_to_reels(self, clip, settings=None):
         """Converte vídeo para formato Reels 9:16"""
+        settings = settings or RenderSettings.final()
         w, h = clip.size
-        target_ratio = config.REELS_WIDTH / config.REELS_HEIGHT
+        target_ratio = settings.width / settings.height
         current_ratio = w / h
         
         if current_ratio > target_ratio:
@@ -34,35 +62,39 @@ class VideoEditor:
             clip = clip.cropped(y1=y_center - new_h/2, y2=y_center + new_h/2)
         
         # Usa new_size (com underscore)
-        return clip.resized(new_size=(config.REELS_WIDTH, config.REELS_HEIGHT))
+        return clip.resized(new_size=(settings.width, settings.height))
     
-    def add_logo_at_end(self, clip, logo_path):
+    def reels_frame(self, frame, settings=None):
+        """Mesmo recorte 9:16 do crop_to_reels, aplicado a um frame (array RGB)"""
+        settings = settings or RenderSettings.final()
+        h, w = frame.shape[:2]
+        target_ratio = settings.width / settings.height
+        
+        if w / h > target_ratio:
+            new_w = int(h * target_ratio)
+            x1 = int(w / 2 - new_w / 2)
+            frame = frame[:, x1:x1 + new_w]
+        else:
+            new_h = int(w / target_ratio)
+            y1 = int(h / 2 - new_h / 2)
+            frame = frame[y1:y1 + new_h]
+        
+        if frame.shape[1] == settings.width and frame.shape[0] == settings.height:
+            return np.ascontiguousarray(frame)
+        # Mesmo filtro do resized do MoviePy
+        resized = Image.fromarray(np.ascontiguousarray(frame)).resize((settings.width, settings.height), Image.Resampling.LANCZOS)
+        return np.asarray(resized)
+    
+    def add_logo_at_end(self, clip, logo_path, settings=None):
         """Adiciona logo no canto inferior direito nos últimos segundos do vídeo"""
+        settings = settings or RenderSettings.final()
         try:
-            # Carrega a logo
-            logo = ImageClip(logo_path)
-            
-            # Redimensiona logo para 20% da largura do vídeo
-            logo_width = int(config.REELS_WIDTH * 0.2)
-            logo = logo.resized(width=logo_width)
+            overlay = LogoOverlay.for_settings(logo_path, clip.duration, settings)
             
-            # Posiciona no canto inferior direito com margem
-            margin = 30
-            logo_x = config.REELS_WIDTH - logo.w - margin
-            logo_y = config.REELS_HEIGHT - logo.h - margin
-            
-            # Define quando a logo aparece (últimos X segundos)
-            logo_start = max(0, clip.duration - config.LOGO_DURATION)
-            logo = logo.with_start(logo_start).with_duration(config.LOGO_DURATION)
-            logo = logo.with_position((logo_x, logo_y))
-            
-            # Adiciona fade in/out suave
-            logo = logo.crossfadein(0.3).crossfadeout(0.3)
-            
-            # Sobrepõe logo no vídeo
-            final_clip = CompositeVideoClip([clip, logo])
-            
-            return final_clip
+            # Só os frames da janela da logo são alterados
+            if hasattr(clip, 'fl'):
+                return clip.fl(lambda get_frame, t: overlay.apply(get_frame(t), t))
+            return clip.transform(lambda get_frame, t: overlay.apply(get_frame(t), t))
         except Exception as e:
             print(f"      ⚠️  Erro ao adicionar logo: {e}")
             return clip
@@ -91,15 +123,17 @@ class VideoEditor:
         
         return clips if clips else [clip]
     
-    def edit_video(self, input_path, output_path):
+    def edit_video(self, input_path, output_path, settings=None):
         """Edita o vídeo completo"""
+        settings = settings or RenderSettings.final()
         print(f"Processando: {input_path}")
         
-        clip = VideoFileClip(input_path)
+        moviepy = load_moviepy()
+        clip = moviepy.VideoFileClip(input_path)
         
         # Se tem áudio customizado, ajusta duração do vídeo
         if self.custom_audio:
-            audio_clip = AudioFileClip(self.custom_audio)
+            audio_clip = self.load_music()
             target_duration = min(audio_clip.duration, config.REELS_MAX_DURATION)
             
             # Ajusta velocidade do vídeo se necessário
@@ -116,21 +150,21 @@ class VideoEditor:
                 clip = clip.subclipped(0, config.REELS_MAX_DURATION)
         
         # Converte para formato Reels
-        clip = self.crop_to_reels(clip)
+        clip = self.crop_to_reels(clip, settings)
         
         # Cria cortes sincronizados
         clips = self.create_cuts(clip)
         
         # Concatena com transições
         if len(clips) > 1:
-            final_clip = concatenate_videoclips(clips, method="compose")
+            final_clip = moviepy.concatenate_videoclips(clips, method="compose")
         else:
             final_clip = clips[0]
         
         # Substitui áudio se fornecido
         if self.custom_audio:
             print(f"   🎵 Aplicando música customizada")
-            audio_clip = AudioFileClip(self.custom_audio)
+            audio_clip = self.load_music()
             
             # Ajusta duração do áudio para match com vídeo
             if audio_clip.duration > final_clip.duration:
@@ -142,11 +176,12 @@ class VideoEditor:
         print(f"Exportando para: {output_path}")
         final_clip.write_videofile(
             output_path,
-            codec='libx264',
-            audio_codec='aac',
-            fps=30,
-            preset='medium',
-            bitrate='8000k'
+            codec=settings.codec,
+            audio_codec=settings.audio_codec,
+            fps=settings.fps,
+            preset=settings.preset,
+            bitrate=settings.bitrate,
+            ffmpeg_params=settings.video_params() or None
         )
         
         clip.close()
@@ -154,83 +189,336 @@ class VideoEditor:
         
         print(f"✓ Vídeo salvo: {output_path}")
     
+    def plan_compilation(self, best_clips, audio_duration):
+        """Planeja a compilação: a Timeline com tudo o que a renderização precisa"""
+        segments = []
+        for clip_info in best_clips:
+            # Extrai o melhor momento
+            start_time = clip_info['start']
+            end_time = min(clip_info['end'], start_time + config.MAX_CLIP_DURATION)
+            segments.append(Segment(
+                path=clip_info['path'],
+                start=start_time,
+                end=end_time,
+                speed=config.SLOW_MOTION_SPEED,
+                score=clip_info.get('score')
+            ))
+        
+        if config.BEAT_SYNC_CUTS and self.beats and audio_duration:
+            segments = self.sync_to_beats(segments, audio_duration)
+        
+        audio = None
+        if self.custom_audio:
+            audio = AudioTrack(path=self.custom_audio, start=self.audio_start, duration=self.audio_duration)
+        
+        logo_path = os.path.join(config.FINAL_DIR, "logo.png")
+        return Timeline(
+            segments=segments,
+            audio=audio,
+            max_duration=audio_duration,
+            beats=[float(t) for t in self.beats],
+            logo_path=logo_path if os.path.exists(logo_path) else None
+        )
+    
+    def sync_to_beats(self, segments, audio_duration):
+        """Ajusta a duração de cada trecho para os cortes caírem nos beats
+        
+        Só muda tempos no plano: nenhum frame é decodificado. Trechos sem
+        espaço entre os beats são descartados; se nenhum couber, mantém os
+        trechos como estão.
+        """
+        speed = config.SLOW_MOTION_SPEED
+        plan = plan_cuts(
+            [{'start': s.start, 'end': s.end, 'score': s.score, 'speed': s.speed} for s in segments],
+            self.beats,
+            audio_duration,
+            min_duration=config.MIN_CLIP_DURATION,
+            max_duration=config.MAX_CLIP_DURATION / speed,
+            score_weight=config.CUT_SCORE_WEIGHT,
+            frame_rate=RenderSettings.final().fps
+        )
+        if not plan:
+            print(f"   ⚠️  Beats sem espaço para os clipes, mantendo os cortes originais")
+            return segments
+        
+        synced = []
+        for index, cut_start, cut_end in plan:
+            segment = segments[index]
+            end = min(segment.end, segment.start + (cut_end - cut_start) * segment.speed)
+            synced.append(replace(segment, end=end))
+        
+        covered = plan[-1][2]
+        print(f"   🥁 {len(synced)} cortes nos beats ({len(segments) - len(synced)} clipes descartados, {covered:.1f}s de {audio_duration:.1f}s)")
+        return synced
+    
     def create_compilation(self, best_clips, output_path, audio_duration):
         """Cria compilação com os melhores momentos sincronizados"""
-        print(f"   Carregando {len(best_clips)} clipes...")
+        timeline = self.plan_compilation(best_clips, audio_duration)
+        self.render_timeline(timeline, output_path)
+        return timeline
+    
+    def render_timeline(self, timeline, output_path, settings=None):
+        """Renderiza uma Timeline já planejada (pode ter vindo de um JSON salvo)
+
+        `settings` define resolução e encoder (padrão: versão final em 1080x1920;
+        RenderSettings.preview() gera uma prévia pequena e rápida).
+        """
+        settings = settings or RenderSettings.final()
+        with profiler.stage("render"):
+            if settings.use_proxies and self.proxies is not None:
+                timeline = self._with_proxies(timeline)
+            
+            if settings.backend in ("ffmpeg", "stream", "chunked"):
+                try:
+                    self.render_with_ffmpeg(timeline, output_path, settings)
+                    print(f"   ✓ Compilação salva: {output_path}")
+                    return
+                except RuntimeError as e:
+                    print(f"   ⚠️  Renderização com ffmpeg falhou, usando MoviePy: {e}")
+            
+            if config.FRAME_PIPELINE:
+                self.render_with_pipeline(timeline, output_path, settings)
+            else:
+                self.render_with_moviepy(timeline, output_path, settings)
+        
+        print(f"   ✓ Compilação salva: {output_path}")
+    
+    def render_with_moviepy(self, timeline, output_path, settings):
+        """Composição no MoviePy: todos os clipes abertos, write_videofile em uma thread"""
+        segments = timeline.segments
+        print(f"   Carregando {len(segments)} clipes...")
         
         all_clips = []
         original_clips = []  # Guarda referências para fechar depois
+        precutter = ClipPrecutter() if config.USE_PRECUT else None
         
-        # Carrega e processa cada clipe
-        for i, clip_info in enumerate(best_clips):
-            print(f"   [{i+1}/{len(best_clips)}] Processando {Path(clip_info['path']).name}")
+        final_clip = None
+        audio_clip = None
+        try:
+            # Carrega e processa cada clipe
+            for i, segment in enumerate(segments):
+                print(f"   [{i+1}/{len(segments)}] Processando {Path(segment.path).name}")
+                clip, subclip = self._open_segment(segment, settings, precutter)
+                original_clips.append(clip)  # Guarda para fechar depois
+                print(f"      Aplicando slow motion ({segment.speed}x)")
+                
+                # Converte para formato Reels
+                subclip = self.crop_to_reels(subclip, settings)
+                
+                all_clips.append(subclip)
             
-            clip = VideoFileClip(clip_info['path'])
-            original_clips.append(clip)  # Guarda para fechar depois
+            # Concatena todos os clipes
+            print(f"   Concatenando clipes...")
+            final_clip = load_moviepy().concatenate_videoclips(all_clips, method="compose")
             
-            # Extrai o melhor momento
-            start_time = clip_info['start']
-            end_time = min(clip_info['end'], start_time + config.MAX_CLIP_DURATION)
+            # Ajusta duração para match com música (se necessário, corta o vídeo)
+            max_duration = timeline.max_duration
+            if max_duration is not None and final_clip.duration > max_duration:
+                print(f"   ✂️  Ajustando duração do vídeo final: {final_clip.duration:.1f}s -> {max_duration:.1f}s")
+                final_clip = final_clip.subclipped(0, max_duration)
             
-            subclip = clip.subclipped(start_time, end_time)
+            # Adiciona música
+            audio_clip = self._music_clip(timeline, final_clip.duration)
+            if audio_clip is not None:
+                final_clip = final_clip.with_audio(audio_clip)
             
-            # Aplica slow motion de 0.8x
-            print(f"      Aplicando slow motion ({config.SLOW_MOTION_SPEED}x)")
-            # MoviePy 2.x usa with_speed_scaled (fator de velocidade)
-            subclip = subclip.with_speed_scaled(config.SLOW_MOTION_SPEED)
+            # Adiciona logo no final se existir
+            logo_path = self._timeline_logo(timeline)
+            if logo_path:
+                print(f"   🎨 Adicionando logo no final do vídeo...")
+                final_clip = self.add_logo_at_end(final_clip, logo_path, settings)
             
-            # Converte para formato Reels
-            subclip = self.crop_to_reels(subclip)
+            # Exporta
+            print(f"   💾 Exportando vídeo final ({settings.width}x{settings.height})...")
+            with profiler.stage("encode"):
+                final_clip.write_videofile(
+                    output_path,
+                    codec=settings.codec,
+                    audio_codec=settings.audio_codec,
+                    fps=settings.fps,
+                    preset=settings.preset,
+                    bitrate=settings.bitrate,
+                    ffmpeg_params=settings.video_params() or None
+                )
+                profiler.count("frames_encoded", int(round(final_clip.duration * settings.fps)))
+        finally:
+            # Fecha tudo e apaga os recortes mesmo se a composição ou o export falhar
+            if final_clip is not None:
+                final_clip.close()
+            if audio_clip is not None:
+                audio_clip.close()
+            for clip in original_clips:
+                clip.close()
             
-            all_clips.append(subclip)
+            if precutter is not None:
+                print(f"   ✂️  Recortes: {precutter.stats['stream_copy']} sem recodificar, {precutter.stats['reencode']} recodificados")
+                precutter.cleanup()
+    
+    def render_with_pipeline(self, timeline, output_path, settings):
+        """Mesma edição do MoviePy, com decodificação, recorte/logo e encode em paralelo
+        
+        Cada clipe só é aberto quando a decodificação chega nele e é fechado
+        logo depois; os frames passam pelo FramePipeline (decodificadores →
+        threads de transformação → escrita em ordem no encoder do MoviePy).
+        """
+        fps = settings.fps
+        plan = StreamingRenderer(settings).frame_plan(timeline)
+        total_frames = sum(count for _, count in plan)
+        duration = total_frames / fps
+        precutter = ClipPrecutter() if config.USE_PRECUT else None
+        
+        overlay = None
+        logo_path = self._timeline_logo(timeline)
+        if logo_path:
+            print(f"   🎨 Adicionando logo no final do vídeo...")
+            overlay = LogoOverlay.for_settings(logo_path, duration, settings)
+        
+        def segment_source(number, segment, count):
+            def frames():
+                print(f"   [{number}/{len(plan)}] Processando {Path(segment.path).name} ({segment.speed}x)")
+                clip, subclip = self._open_segment(segment, settings, precutter)
+                try:
+                    # Último instante com frame: nunca pede além do fim do trecho
+                    last = max(0.0, subclip.duration - 0.5 / fps)
+                    for k in range(count):
+                        profiler.count("frames_decoded")
+                        yield subclip.get_frame(min(k / fps, last))
+                finally:
+                    clip.close()
+            return frames
+        
+        def transform(frame, index):
+            with profiler.stage("crop_to_reels"):
+                frame = self.reels_frame(frame, settings)
+            if overlay is not None:
+                frame = overlay.apply(frame, index / fps)
+            return frame
+        
+        def write(frame):
+            writer.write_frame(frame)
+            profiler.count("frames_encoded")
+        
+        sources = [segment_source(i, segment, count) for i, ((segment, _, _), count) in enumerate(plan, 1)]
+        
+        audio_path = None
+        audio_clip = self._music_clip(timeline, duration)
+        work_dir = tempfile.mkdtemp(prefix="reels_pipeline_")
+        try:
+            if audio_clip is not None:
+                audio_path = os.path.join(work_dir, "audio.m4a")
+                with profiler.stage("write_audio"):
+                    audio_clip.write_audiofile(audio_path, fps=config.AUDIO_SAMPLE_RATE, codec=settings.audio_codec, logger=None)
+            
+            print(f"   💾 Exportando vídeo final (pipeline, {settings.width}x{settings.height}, {total_frames} frames)...")
+            from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+            writer = FFMPEG_VideoWriter(
+                output_path,
+                (settings.width, settings.height),
+                fps,
+                codec=settings.codec,
+                audiofile=audio_path,
+                audio_codec="copy" if audio_path else None,
+                preset=settings.preset,
+                bitrate=settings.bitrate,
+                ffmpeg_params=settings.video_params() or None
+            )
+            try:
+                with profiler.stage("encode"):
+                    FramePipeline().run(sources, transform, write)
+            finally:
+                writer.close()
+        finally:
+            if audio_clip is not None:
+                audio_clip.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+            if precutter is not None:
+                print(f"   ✂️  Recortes: {precutter.stats['stream_copy']} sem recodificar, {precutter.stats['reencode']} recodificados")
+                precutter.cleanup()
+    
+    def _open_segment(self, segment, settings, precutter=None):
+        """Abre o trecho já com o slow motion: retorna (clipe original, trecho)"""
+        source = segment.path
+        start_time = segment.start
+        end_time = segment.end
         
-        # Concatena todos os clipes
-        print(f"   Concatenando clipes...")
-        final_clip = concatenate_videoclips(all_clips, method="compose")
+        if precutter is not None:
+            # Recorta só o trecho usado num arquivo pequeno (cópia sem recodificar sempre que possível)
+            try:
+                source = precutter.cut(segment.path, start_time, end_time)
+                start_time, end_time = 0, end_time - start_time
+            except RuntimeError as e:
+                print(f"      ⚠️  Não foi possível recortar, usando o vídeo original: {e}")
         
-        # Ajusta duração para match com música (se necessário, corta o vídeo)
-        if final_clip.duration > audio_duration:
-            print(f"   ✂️  Ajustando duração do vídeo final: {final_clip.duration:.1f}s -> {audio_duration:.1f}s")
-            final_clip = final_clip.subclipped(0, audio_duration)
+        # Na prévia o ffmpeg já decodifica reduzido: target_resolution é (largura, altura), fixa só a altura final
+        # e a largura sobra para o recorte 9:16
+        target_resolution = (None, settings.height) if settings.width < config.REELS_WIDTH else None
+        clip = load_moviepy().VideoFileClip(source, target_resolution=target_resolution)
+        
+        subclip = clip.subclipped(start_time, min(end_time, clip.duration))
+        
+        # MoviePy 2.x usa with_speed_scaled (fator de velocidade)
+        subclip = subclip.with_speed_scaled(segment.speed)
+        return clip, subclip
+    
+    def _music_clip(self, timeline, duration):
+        """Trecho da música da timeline com a duração do vídeo (None se não houver música)"""
+        if timeline.audio is None:
+            return None
         
-        # Adiciona música
         print(f"   🎵 Aplicando música")
-        audio_clip = AudioFileClip(self.custom_audio)
+        audio = timeline.audio
+        audio_clip = self.load_music(audio.path)
         
         # Extrai apenas o trecho selecionado da música
-        if self.audio_start > 0 or (self.audio_duration and self.audio_duration < audio_clip.duration):
-            end_time = self.audio_start + (self.audio_duration or audio_clip.duration)
-            audio_clip = audio_clip.subclipped(self.audio_start, min(end_time, audio_clip.duration))
+        if audio.start > 0 or (audio.duration and audio.duration < audio_clip.duration):
+            end_time = audio.start + (audio.duration or audio_clip.duration)
+            audio_clip = audio_clip.subclipped(audio.start, min(end_time, audio_clip.duration))
         
         # Ajusta duração do áudio para match com vídeo
-        if audio_clip.duration > final_clip.duration:
-            audio_clip = audio_clip.subclipped(0, final_clip.duration)
+        if audio_clip.duration > duration:
+            audio_clip = audio_clip.subclipped(0, duration)
+        return audio_clip
+    
+    def render_with_ffmpeg(self, timeline, output_path, settings=None):
+        """Mesma edição da compilação, renderizada pelo ffmpeg
         
-        final_clip = final_clip.with_audio(audio_clip)
+        Backend "ffmpeg": uma única chamada com filter_complex (todos os vídeos
+        abertos juntos). Backend "stream": um vídeo aberto por vez, frames em
+        fila limitada até o encoder (memória independente do número de clipes).
+        Backend "chunked": pedaços da timeline codificados em paralelo e
+        juntados sem recodificar (usa melhor máquinas com muitos núcleos); com
+        config.SEGMENT_CACHE_ENABLED, clipes que não mudaram vêm do cache.
+        """
+        settings = settings or RenderSettings.final()
+        if timeline.audio is not None:
+            print(f"   🎵 Aplicando música")
         
-        # Adiciona logo no final se existir
-        logo_path = os.path.join(config.FINAL_DIR, "logo.png")
-        if os.path.exists(logo_path):
+        logo_path = self._timeline_logo(timeline)
+        if logo_path:
             print(f"   🎨 Adicionando logo no final do vídeo...")
-            final_clip = self.add_logo_at_end(final_clip, logo_path)
-        else:
-            print(f"   ⚠️  Logo não encontrada em {logo_path}")
+        if logo_path != timeline.logo_path:
+            timeline = replace(timeline, logo_path=logo_path)
         
-        # Exporta
-        print(f"   💾 Exportando vídeo final...")
-        final_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            fps=30,
-            preset='medium',
-            bitrate='8000k'
-        )
-        
-        # Fecha tudo depois de exportar
-        final_clip.close()
-        audio_clip.close()
-        for clip in original_clips:
-            clip.close()
-        
-        print(f"   ✓ Compilação salva: {output_path}")
+        if settings.backend == "stream":
+            renderer = StreamingRenderer(settings)
+        elif settings.backend == "chunked":
+            renderer = ChunkedRenderer(settings, cache=SegmentCache() if config.SEGMENT_CACHE_ENABLED else None,
+                                       evict_cache=self.evict_segments)
+        else:
+            renderer = FFmpegRenderer(settings)
+        print(f"   💾 Exportando vídeo final ({settings.backend}, {len(timeline.segments)} clipes, {renderer.width}x{renderer.height})...")
+        return renderer.render(timeline, output_path)
+    
+    def _with_proxies(self, timeline):
+        """Mesma timeline lendo os proxies (os tempos são os mesmos dos originais)"""
+        print(f"   🗜️  Usando proxies dos vídeos...")
+        segments = [replace(segment, path=self.proxies.get(segment.path)) for segment in timeline.segments]
+        return replace(timeline, segments=segments)
+    
+    def _timeline_logo(self, timeline):
+        """Logo da timeline, se ainda existir no disco"""
+        logo_path = timeline.logo_path or os.path.join(config.FINAL_DIR, "logo.png")
+        if timeline.logo_path and os.path.exists(logo_path):
+            return logo_path
+        print(f"   ⚠️  Logo não encontrada em {logo_path}")
+        return None